@@ -1,2 +1,4 @@
 # FastAPI Humanizer Package
-__version__ = "2.0.0" 
\ No newline at end of file
+from . import startup  # First, so startup timing includes every other import
+
+__version__ = "2.0.0" 
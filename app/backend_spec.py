@@ -0,0 +1,8 @@
+# Kept free of imports so lifespan can validate backend settings without loading any client library
+BACKEND_KINDS = ('openai', 'local', 'stub')
+
+
+def check_backend_spec(spec: str):
+    """Raise ValueError for a spec make_backend cannot build, without building anything"""
+    if spec.partition(':')[0] not in BACKEND_KINDS:
+        raise ValueError(f"Unknown LLM backend: {spec}")
@@ -0,0 +1,186 @@
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from .backend_spec import check_backend_spec
+from .transport import request_timeout
+
+
+class OpenAIBackend:
+    """Chat completions from the OpenAI API or any server that speaks the same protocol"""
+
+    def __init__(self, name: str, client, model: str):
+        self.name = name
+        self.client = client
+        self.model = model
+
+    async def complete(self, messages: List[Dict], max_tokens: int, temperature: float, timeout: float, **kwargs):
+        return await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=request_timeout(timeout),
+            **kwargs
+        )
+
+
+class StubBackend:
+    """Deterministic offline backend: echoes each original text as "Rewritten: <text>" after a fixed delay"""
+
+    def __init__(self, name: str = 'stub', delay: float = 0.0):
+        self.name = name
+        self.model = 'stub'
+        self.delay = delay
+        self.calls = 0
+
+    async def complete(self, messages: List[Dict], max_tokens: int, temperature: float, timeout: float, **kwargs):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        prompt = messages[-1]['content']
+        if 'Texts (JSON array):' in prompt:
+            texts = json.loads(prompt.split('Texts (JSON array):', 1)[1])
+            content = json.dumps({"rewrites": [f"Rewritten: {text}" for text in texts]})
+        else:
+            content = f"Rewritten: {prompt.split('Original: ', 1)[-1].split(chr(10), 1)[0]}"
+        if kwargs.get('stream'):
+            return self._stream(content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    async def _stream(self, content: str):
+        for word in content.split(' '):
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=word + ' '))])
+
+
+def make_backend(spec: str, http_client: httpx.AsyncClient):
+    """Build a backend from "openai[:model]", "local[:model]" or "stub[:delay_ms]" """
+    check_backend_spec(spec)
+    kind, _, option = spec.partition(':')
+    if kind == 'stub':
+        return StubBackend(spec, float(option or 0) / 1000)
+    import openai  # Only once a client is built, so FAST-only processes never load it
+    if kind == 'openai':
+        client = openai.AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'), max_retries=0, http_client=http_client)
+        return OpenAIBackend(spec, client, option or os.getenv('OPENAI_MODEL', 'gpt-3.5-turbo'))
+    client = openai.AsyncOpenAI(
+        base_url=os.getenv('LOCAL_LLM_BASE_URL', 'http://localhost:8080/v1'),
+        api_key=os.getenv('LOCAL_LLM_API_KEY', 'local'),
+        max_retries=0,
+        http_client=http_client,
+    )
+    return OpenAIBackend(spec, client, option or os.getenv('LOCAL_LLM_MODEL', 'local-model'))
+
+
+class LatencyTracker:
+    """Recent call latencies, for percentile thresholds"""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+class Hedger:
+    """Sends a backup request to an alternate backend when the primary is slower than usual.
+
+    Once the primary has been running longer than the HEDGE_PERCENTILE
+    latency of recent calls, the same request goes to the alternate. The
+    first successful answer wins and the other request is cancelled. An
+    `admit` callback can veto the backup request, e.g. when the rate
+    limiter has no room for a second call.
+    """
+
+    def __init__(self, primary, alternate=None, percentile: Optional[float] = None,
+                 min_samples: Optional[int] = None, initial_delay: Optional[float] = None,
+                 min_delay: Optional[float] = None):
+        self.primary = primary
+        self.alternate = alternate
+        self.percentile = percentile if percentile is not None else float(os.getenv('HEDGE_PERCENTILE', '95'))
+        self.min_samples = min_samples if min_samples is not None else int(os.getenv('HEDGE_MIN_SAMPLES', '20'))
+        if initial_delay is None:
+            initial_delay = float(os.getenv('HEDGE_INITIAL_DELAY_MS', '1500')) / 1000
+        if min_delay is None:
+            min_delay = float(os.getenv('HEDGE_MIN_DELAY_MS', '100')) / 1000
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.latency = LatencyTracker()
+        self.calls = 0
+        self.hedged = 0
+        self.hedges_skipped = 0
+        self.hedge_wins = 0
+
+    def delay(self) -> float:
+        """How long the primary gets before a hedge is sent"""
+        if len(self.latency) < self.min_samples:
+            return self.initial_delay
+        return max(self.min_delay, self.latency.percentile(self.percentile))
+
+    async def call(self, request: Callable[[Any, float], Awaitable[Any]], timeout: float,
+                   hedge: bool = True, admit: Optional[Callable[[], bool]] = None) -> Tuple[Any, Any]:
+        """Run request(backend, timeout) and return (backend, result) from whichever answers first"""
+        self.calls += 1
+        start = time.monotonic()
+        if self.alternate is None or not hedge:
+            result = await request(self.primary, timeout)
+            if hedge:
+                self.latency.add(time.monotonic() - start)
+            return self.primary, result
+
+        delay = self.delay()
+        first = asyncio.ensure_future(request(self.primary, timeout))
+        tasks = {first: self.primary}
+        try:
+            done, _ = await asyncio.wait({first}, timeout=delay if delay < timeout else None)
+            if not done and admit is not None and not admit():
+                self.hedges_skipped += 1
+            elif not done:
+                self.hedged += 1
+                second = asyncio.ensure_future(request(self.alternate, max(0.0, timeout - delay)))
+                tasks[second] = self.alternate
+
+            pending = set(tasks)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    if task is not first:
+                        self.hedge_wins += 1
+                    # When the hedge wins, the primary took at least this long
+                    self.latency.add(time.monotonic() - start)
+                    return tasks[task], task.result()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stats(self) -> Dict:
+        return {
+            'primary': self.primary.name,
+            'alternate': self.alternate.name if self.alternate else None,
+            'calls': self.calls,
+            'hedged': self.hedged,
+            'hedges_skipped': self.hedges_skipped,
+            'hedge_wins': self.hedge_wins,
+            'hedge_delay_ms': self.delay() * 1000 if self.alternate else None,
+            'latency_samples': len(self.latency),
+        }
@@ -0,0 +1,105 @@
+import os
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from .backends import LatencyTracker
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling OpenAI while the circuit is open"""
+
+
+class CircuitBreaker:
+    """Stops calling OpenAI while most recent calls fail or are too slow.
+
+    Closed: calls go through and their outcomes are tracked. Once at least
+    `min_calls` of the last `window` calls are in and `error_rate` of them
+    failed (errors, timeouts, or successes slower than `slow_call`), the
+    circuit opens and calls are skipped outright. After `cooldown` seconds
+    it is half open: one probe call is let through per `cooldown`, and its
+    outcome closes or reopens the circuit.
+    """
+
+    def __init__(self, error_rate: Optional[float] = None, min_calls: Optional[int] = None,
+                 window: Optional[int] = None, slow_call: Optional[float] = None,
+                 cooldown: Optional[float] = None):
+        self.error_rate = error_rate if error_rate is not None else float(os.getenv('CIRCUIT_ERROR_RATE', '0.5'))
+        self.min_calls = min_calls or int(os.getenv('CIRCUIT_MIN_CALLS', '10'))
+        self.slow_call = slow_call or float(os.getenv('CIRCUIT_SLOW_MS', '4000')) / 1000
+        self.cooldown = cooldown or float(os.getenv('CIRCUIT_COOLDOWN_SECONDS', '30'))
+        self._outcomes = deque(maxlen=window or int(os.getenv('CIRCUIT_WINDOW', '20')))
+        self.latency = LatencyTracker(window=100)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._next_probe_at = 0.0
+        self.opened = 0
+        self.short_circuited = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+            self._state = HALF_OPEN
+            self._next_probe_at = 0.0
+        return self._state
+
+    def available(self) -> bool:
+        """Could a call go through now (without claiming a half-open probe)"""
+        state = self.state
+        return state == CLOSED or (state == HALF_OPEN and time.monotonic() >= self._next_probe_at)
+
+    def allow(self) -> bool:
+        """Claim permission for one call; in half-open state only the probe gets it"""
+        state = self.state
+        if state == HALF_OPEN and time.monotonic() >= self._next_probe_at:
+            # Time-based rather than counted, so a probe cancelled mid-call cannot wedge the breaker
+            self._next_probe_at = time.monotonic() + self.cooldown
+            return True
+        if state == CLOSED:
+            return True
+        self.short_circuited += 1
+        return False
+
+    def record(self, success: bool, seconds: float):
+        self.latency.add(seconds)
+        failed = not success or seconds > self.slow_call
+        if self._state == HALF_OPEN:
+            if failed:
+                self._open()
+            else:
+                self._state = CLOSED
+                self._outcomes.clear()
+            return
+        if self._state == OPEN:
+            return  # A call that started before the circuit opened
+        self._outcomes.append(failed)
+        if len(self._outcomes) >= self.min_calls and self.failure_rate() >= self.error_rate:
+            self._open()
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.opened += 1
+        print(f"OpenAI circuit opened for {self.cooldown:.0f}s")
+
+    def failure_rate(self) -> float:
+        return sum(self._outcomes) / len(self._outcomes) if self._outcomes else 0.0
+
+    def too_slow_for(self, budget: float) -> bool:
+        """Would a typical slow call (p95 of recent ones) use up `budget` seconds"""
+        if len(self.latency) < self.min_calls:
+            return False
+        return self.latency.percentile(95) >= budget
+
+    def stats(self) -> Dict:
+        p95 = self.latency.percentile(95)
+        return {
+            'state': self.state,
+            'failure_rate': self.failure_rate(),
+            'opened': self.opened,
+            'short_circuited': self.short_circuited,
+            'p95_latency_ms': p95 * 1000 if p95 is not None else None,
+        }
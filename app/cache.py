@@ -0,0 +1,216 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from . import metrics
+
+
+class MemoryLRU:
+    """In-process LRU bounded by a byte budget, with per-entry TTL"""
+
+    def __init__(self, max_bytes: int, ttl: Optional[float] = None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.bytes_used = 0
+        self._entries: 'OrderedDict[str, Tuple[Any, int, Optional[float]]]' = OrderedDict()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, size, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, size: int):
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        self._entries[key] = (value, size, expires_at)
+        self.bytes_used += size
+        while self.bytes_used > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def delete(self, key: str) -> bool:
+        if key not in self._entries:
+            return False
+        self._remove(key)
+        return True
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes_used = 0
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self.bytes_used -= size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ResponseCache:
+    """Content-addressed cache for OpenAI rewrites.
+
+    An in-memory LRU sits in front of an optional Redis tier (enabled by
+    REDIS_URL). Redis hits are copied into memory; Redis failures count as
+    misses so a cache outage never fails a request.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, ttl: Optional[float] = None,
+                 redis_url: Optional[str] = None):
+        if max_bytes is None:
+            max_bytes = int(os.getenv('OPENAI_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+        if ttl is None:
+            ttl = float(os.getenv('OPENAI_CACHE_TTL', '86400'))
+        self.ttl = ttl
+        self.memory = MemoryLRU(max_bytes, ttl)
+        self.redis_url = redis_url if redis_url is not None else os.getenv('REDIS_URL')
+        self._redis = None
+        self.counters = {'memory_hits': 0, 'redis_hits': 0, 'misses': 0, 'redis_errors': 0}
+
+    @staticmethod
+    def make_key(text: str, model: str, temperature: float, aggressive: bool, prompt_version: str) -> str:
+        """Stable digest of everything that shapes the completion"""
+        digest = hashlib.sha256()
+        for part in (prompt_version, model, repr(float(temperature)), '1' if aggressive else '0', text):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\x00')
+        return f"humanizer:openai:{digest.hexdigest()}"
+
+    def _get_redis(self):
+        if self._redis is None and self.redis_url:
+            import redis.asyncio as redis_asyncio
+            self._redis = redis_asyncio.from_url(self.redis_url, decode_responses=True)
+        return self._redis
+
+    async def get(self, key: str) -> Optional[str]:
+        value = self.memory.get(key)
+        if value is not None:
+            self.counters['memory_hits'] += 1
+            metrics.CACHE_LOOKUPS.labels('openai', 'memory_hit').inc()
+            return value
+
+        client = self._get_redis()
+        if client is not None:
+            try:
+                value = await client.get(key)
+            except Exception:
+                self.counters['redis_errors'] += 1
+                value = None
+            if value is not None:
+                self.counters['redis_hits'] += 1
+                metrics.CACHE_LOOKUPS.labels('openai', 'redis_hit').inc()
+                self.memory.set(key, value, _size_of(key, value))
+                return value
+
+        self.counters['misses'] += 1
+        metrics.CACHE_LOOKUPS.labels('openai', 'miss').inc()
+        return None
+
+    async def set(self, key: str, value: str):
+        self.memory.set(key, value, _size_of(key, value))
+
+        client = self._get_redis()
+        if client is not None:
+            try:
+                await client.set(key, value, ex=int(self.ttl) if self.ttl else None)
+            except Exception:
+                self.counters['redis_errors'] += 1
+
+    async def close(self):
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+    def stats(self) -> Dict:
+        hits = self.counters['memory_hits'] + self.counters['redis_hits']
+        lookups = hits + self.counters['misses']
+        return {
+            **self.counters,
+            'hit_ratio': hits / lookups if lookups else 0.0,
+            'entries': len(self.memory),
+            'bytes': self.memory.bytes_used,
+            'max_bytes': self.memory.max_bytes,
+            'evictions': self.memory.evictions,
+            'redis_enabled': bool(self.redis_url),
+        }
+
+
+class FastResultCache:
+    """Memoized FAST-mode responses for seeded requests.
+
+    Seeded FAST output depends only on (text, seed, rule version), so the
+    whole response can be reused. Keys carry the rule version, and entries
+    of an older version are dropped as soon as a newer one is seen.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        if max_bytes is None:
+            max_bytes = int(os.getenv('FAST_CACHE_MAX_BYTES', str(16 * 1024 * 1024)))
+        self.enabled = max_bytes > 0
+        self.memory = MemoryLRU(max_bytes)
+        self.version: Optional[str] = None
+        self.counters = {'hits': 0, 'misses': 0, 'invalidations': 0}
+        self.saved_seconds = 0.0
+
+    @staticmethod
+    def make_key(text: str, seed: int, version: str) -> str:
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        return f"humanizer:fast:{version}:{seed}:{digest}"
+
+    def _sync(self, version: str):
+        if version != self.version:
+            if self.version is not None:
+                self.memory.clear()
+                self.counters['invalidations'] += 1
+            self.version = version
+
+    def get(self, key: str, version: str) -> Optional[Dict]:
+        self._sync(version)
+        entry = self.memory.get(key)
+        if entry is None:
+            self.counters['misses'] += 1
+            metrics.CACHE_LOOKUPS.labels('fast', 'miss').inc()
+            return None
+        result, cost = entry
+        self.counters['hits'] += 1
+        metrics.CACHE_LOOKUPS.labels('fast', 'hit').inc()
+        self.saved_seconds += cost
+        metrics.CPU_SECONDS_SAVED.labels('fast').inc(cost)
+        return result
+
+    def set(self, key: str, version: str, result: Dict, cost: float):
+        """Store a response that took `cost` seconds to compute under rule `version`"""
+        if version != self.version:
+            return  # Computed with rules that have since been replaced
+        size = len(key) + sum(len(str(value)) for value in result.values()) + 100
+        self.memory.set(key, (result, cost), size)
+
+    def stats(self) -> Dict:
+        lookups = self.counters['hits'] + self.counters['misses']
+        return {
+            **self.counters,
+            'enabled': self.enabled,
+            'hit_ratio': self.counters['hits'] / lookups if lookups else 0.0,
+            'saved_cpu_ms': self.saved_seconds * 1000,
+            'entries': len(self.memory),
+            'bytes': self.memory.bytes_used,
+            'max_bytes': self.memory.max_bytes,
+            'evictions': self.memory.evictions,
+            'rule_version': self.version,
+        }
+
+
+def _size_of(key: str, value: str) -> int:
+    return len(key) + len(value.encode('utf-8'))
@@ -0,0 +1,29 @@
+import os
+import time
+from typing import Optional
+
+
+class Deadline:
+    """Wall-clock budget for one request; a budget of None never expires"""
+
+    def __init__(self, budget_ms: Optional[float] = None):
+        self.expires_at = time.monotonic() + budget_ms / 1000 if budget_ms is not None else None
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, or None when unbounded"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def allows_openai(self) -> bool:
+        """Is there enough budget left to make an OpenAI call worthwhile"""
+        remaining = self.remaining()
+        return remaining is None or remaining * 1000 >= OPENAI_MIN_BUDGET_MS
+
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+
+# Below this many milliseconds an OpenAI call cannot realistically finish, so skip it
+OPENAI_MIN_BUDGET_MS = float(os.getenv('OPENAI_MIN_BUDGET_MS', '150'))
@@ -0,0 +1,171 @@
+import asyncio
+import multiprocessing
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple, Union
+
+from . import metrics
+from .patterns import AdvancedPatterns
+from .rulepack import RuleManager, RuleRef, load_ruleset, load_snapshot
+
+# Each pool worker keeps its compiled patterns until the parent's rules change
+_worker_patterns: Optional[AdvancedPatterns] = None
+_worker_version: Optional[str] = None
+
+
+def _init_worker(ref: Optional[RuleRef] = None):
+    _patterns_for(ref)
+
+
+def _patterns_for(ref: Optional[RuleRef]) -> AdvancedPatterns:
+    """The worker's patterns, reloaded when the parent sends a newer rule version"""
+    global _worker_patterns, _worker_version
+    if ref is None:
+        if _worker_patterns is None:
+            _worker_patterns = AdvancedPatterns()
+    elif ref.version != _worker_version:
+        rules = None
+        if ref.snapshot:
+            try:
+                rules = load_snapshot(ref.snapshot)
+            except Exception as e:
+                print(f"Worker could not load rule snapshot, compiling instead: {e}")
+        if rules is None:
+            rules = load_ruleset(ref.source)
+        _worker_patterns = rules.patterns
+        _worker_version = ref.version
+    return _worker_patterns
+
+
+def _warm_worker(ref: Optional[RuleRef]) -> int:
+    return os.getpid()
+
+
+def _rng(seed: Optional[int]):
+    """A generator private to one text when seeded, else the shared global one"""
+    return random if seed is None else random.Random(seed)
+
+
+def _apply_timed(patterns: AdvancedPatterns, text: str, seed: Optional[int]):
+    """((text, changes), stage timings); workers send timings back since metrics live in the parent"""
+    timings = {}
+    return patterns.apply_patterns(text, _rng(seed), timings), timings
+
+
+def _apply_in_worker(ref: Optional[RuleRef], text: str, seed: Optional[int]):
+    return _apply_timed(_patterns_for(ref), text, seed)
+
+
+def _apply_many_in_worker(ref: Optional[RuleRef], texts: List[str], seeds: List[Optional[int]]):
+    patterns = _patterns_for(ref)
+    return [_apply_timed(patterns, text, seed) for text, seed in zip(texts, seeds)]
+
+
+def _observed(timed_result) -> Tuple[str, List[str]]:
+    result, timings = timed_result
+    metrics.observe_stages(timings)
+    return result
+
+
+class RegexExecutor:
+    """Runs apply_patterns inline, on the default thread pool or on a process pool.
+
+    Short texts are cheaper to transform than to ship to another thread or
+    process, so anything up to `inline_threshold` characters runs directly
+    on the event loop. Longer texts and whole batches go to the backend.
+
+    Given a RuleManager instead of fixed patterns, every call uses the
+    current rules, and pool workers reload when the rule version changes.
+    """
+
+    def __init__(self, patterns: Union[AdvancedPatterns, RuleManager], backend: Optional[str] = None,
+                 workers: Optional[int] = None, inline_threshold: Optional[int] = None):
+        self.rules = patterns if isinstance(patterns, RuleManager) else None
+        self._patterns = None if self.rules else patterns
+        self.backend = backend or os.getenv('REGEX_EXECUTOR', 'thread')
+        self.workers = workers or int(os.getenv('REGEX_POOL_WORKERS', str(os.cpu_count() or 1)))
+        if inline_threshold is None:
+            inline_threshold = int(os.getenv('REGEX_INLINE_THRESHOLD', '1000'))
+        self.inline_threshold = inline_threshold
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+
+        if self.backend not in ('thread', 'process'):
+            raise ValueError(f"Unknown REGEX_EXECUTOR backend: {self.backend}")
+
+    @property
+    def patterns(self) -> AdvancedPatterns:
+        return self.rules.current.patterns if self.rules else self._patterns
+
+    def _rule_ref(self) -> Optional[RuleRef]:
+        return self.rules.current.ref if self.rules else None
+
+    def start(self):
+        """Create the process pool and make sure every worker has loaded its patterns"""
+        if self.backend != 'process' or self._pool is not None:
+            return
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(self._rule_ref(),),
+        )
+        # Spawning happens on demand, so push one task per worker to warm them all up
+        list(self._pool.map(_warm_worker, [self._rule_ref()] * self.workers))
+
+    async def ensure_started(self):
+        """start() on a worker thread, so spawning the pool never blocks the event loop"""
+        if self.backend != 'process' or self._pool is not None:
+            return
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:  # Concurrent first calls share one pool
+            await asyncio.get_running_loop().run_in_executor(None, self.start)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    async def apply(self, text: str, seed: Optional[int] = None) -> Tuple[str, List[str]]:
+        """Transform one text; with a seed the result is the same wherever it runs"""
+        patterns = self.patterns
+        if len(text) <= self.inline_threshold:
+            return _observed(_apply_timed(patterns, text, seed))
+
+        loop = asyncio.get_running_loop()
+        if self.backend == 'process':
+            await self.ensure_started()
+            return _observed(await loop.run_in_executor(self._pool, _apply_in_worker, self._rule_ref(), text, seed))
+        return _observed(await loop.run_in_executor(None, _apply_timed, patterns, text, seed))
+
+    async def apply_many(self, texts: List[str], seed: Optional[int] = None,
+                         seeds: Optional[List[Optional[int]]] = None) -> List[Tuple[str, List[str]]]:
+        """Transform a batch, splitting it into one chunk per worker.
+
+        A seed applies to each text on its own, so a text comes out the same
+        as it would from apply() with that seed; `seeds` gives each text its own.
+        """
+        if seeds is None:
+            seeds = [seed] * len(texts)
+        if self.backend != 'process' or sum(len(text) for text in texts) <= self.inline_threshold:
+            return list(await asyncio.gather(*(self.apply(text, seed) for text, seed in zip(texts, seeds))))
+
+        await self.ensure_started()
+        loop = asyncio.get_running_loop()
+        chunk_size = -(-len(texts) // self.workers)
+        ref = self._rule_ref()
+        chunk_results = await asyncio.gather(*(
+            loop.run_in_executor(self._pool, _apply_many_in_worker, ref, texts[i:i + chunk_size], seeds[i:i + chunk_size])
+            for i in range(0, len(texts), chunk_size)
+        ))
+        return [_observed(result) for chunk in chunk_results for result in chunk]
+
+    def stats(self) -> dict:
+        return {
+            'backend': self.backend,
+            'workers': self.workers if self.backend == 'process' else None,
+            'inline_threshold': self.inline_threshold,
+            'pool_started': self._pool is not None,
+        }
@@ -0,0 +1,93 @@
+import re
+from collections import Counter
+from typing import Dict, List, Sequence, Tuple
+
+from .patterns import TYPO_RULES
+from .rule_engine import CompiledRule, compile_rules, fuse_rules, sre_constants, sre_parse
+
+# The trailing cleanup rules of TYPO_RULES, done as one split/join instead of two regex passes
+WHITESPACE_RULES = [(r'\s+', ' '), (r'^\s+|\s+$', '')]
+
+# Whitespace that `\s+ -> ' '` would change: any run longer than one char, or one that is not a plain space
+_UNTIDY_WHITESPACE = re.compile(r'\s{2,}|[^\S ]')
+
+
+class GrammarFixer:
+    """TYPO_RULES compiled once, with independent literal rules fused into single scans.
+
+    Output and reported fixes match running every rule as its own re.sub
+    in order. Rules that can never change text are skipped (and listed in
+    `noop_rules`); matches that left the text as it was are counted per rule.
+    """
+
+    def __init__(self, rules: Sequence[Tuple[str, str]] = TYPO_RULES):
+        rules = list(rules)
+        self.tidy_whitespace = rules[-len(WHITESPACE_RULES):] == WHITESPACE_RULES
+        if self.tidy_whitespace:
+            rules = rules[:-len(WHITESPACE_RULES)]
+
+        self.noop_rules = [pattern for pattern, replacement in rules if _is_identity(pattern, replacement)]
+        rules = [(pattern, replacement) for pattern, replacement in rules if pattern not in self.noop_rules]
+
+        self._passes = fuse_rules(compile_rules(rules, re.IGNORECASE), re.IGNORECASE, changes_only=True)
+        self._unchanged = Counter()
+
+    def fix(self, text: str) -> Tuple[str, List[str]]:
+        fixes_applied = []
+
+        for rule_pass in self._passes:
+            if isinstance(rule_pass, CompiledRule):
+                if rule_pass.regex.search(text) is None:
+                    continue
+                new_text = rule_pass.regex.sub(rule_pass.repl, text)
+                if new_text == text:
+                    self._unchanged[rule_pass.pattern] += 1
+                    continue
+                text = new_text
+                fired = (rule_pass,)
+            else:
+                text, fired = rule_pass.apply(text)
+            fixes_applied.extend(f"Grammar fix: {rule.pattern} → {rule.replacement}" for rule in fired)
+
+        if self.tidy_whitespace and text:
+            if _UNTIDY_WHITESPACE.search(text):
+                fixes_applied.append(f"Grammar fix: {WHITESPACE_RULES[0][0]} → {WHITESPACE_RULES[0][1]}")
+            if text[0].isspace() or text[-1].isspace():
+                fixes_applied.append(f"Grammar fix: {WHITESPACE_RULES[1][0]} → {WHITESPACE_RULES[1][1]}")
+            text = ' '.join(text.split())
+
+        return text, fixes_applied
+
+    def stats(self) -> Dict:
+        unchanged = Counter(self._unchanged)
+        for rule_pass in self._passes:
+            if not isinstance(rule_pass, CompiledRule):
+                unchanged.update(rule_pass.unchanged)
+        return {
+            'passes': len(self._passes) + self.tidy_whitespace,
+            'noop_rules': self.noop_rules,
+            'matched_without_change': dict(unchanged),
+        }
+
+
+def _is_identity(pattern: str, replacement: str) -> bool:
+    """True when the replacement rebuilds every match exactly, e.g. `\\b(with|by) \\b` -> `\\1 `"""
+    try:
+        parsed = sre_parse.parse(pattern, re.IGNORECASE)
+    except re.error:
+        return False
+
+    expected = []
+    for op, av in parsed:
+        if op is sre_constants.AT:
+            continue  # Zero-width, nothing to rebuild
+        if op is sre_constants.LITERAL:
+            char = chr(av)
+            if char.lower() != char.upper():
+                return False  # Case-insensitive, so the match may differ in case
+            expected.append('\\\\' if char == '\\' else char)
+        elif op is sre_constants.SUBPATTERN and av[0] is not None:
+            expected.append(f'\\{av[0]}')
+        else:
+            return False
+    return ''.join(expected) == replacement
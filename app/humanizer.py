@@ -1,40 +1,129 @@
 import asyncio
-from typing import Dict, List
+import itertools
+import os
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional, Tuple
 import time
+import random
 import re
-from .patterns import AdvancedPatterns, TYPO_RULES
-from .openai_client import OpenAIHumanizer
+from .rulepack import RuleManager
+from . import metrics, startup
+from .cache import FastResultCache
+from .detection import detection_score, extract_features, needs_enhancement
+from .executor import RegexExecutor
+from .deadline import Deadline
+from .scheduler import BatchScheduler
 from .models import ProcessingMode
+from .tokens import split_chunks, tail_context
+
+if TYPE_CHECKING:
+    from .openai_client import OpenAIHumanizer
 
 class HybridHumanizer:
     def __init__(self):
-        self.patterns = AdvancedPatterns()
-        self.openai = OpenAIHumanizer()
+        self.rules = RuleManager()
+        self.regex_executor = RegexExecutor(self.rules)
+        self.fast_cache = FastResultCache()
+        self._openai: Optional['OpenAIHumanizer'] = None
+        self.scheduler = BatchScheduler()
+        self._pack_groups = itertools.count()
+        # Longer texts are rewritten in paragraph-aligned chunks of this many tokens, concurrently
+        self.chunk_max_tokens = int(os.getenv('CHUNK_MAX_TOKENS', '500'))
+        
+        # Sentence-level indicators used to route BALANCED spans to OpenAI
+        self._sentence_splitter = re.compile(r'(?<=[.!?])\s+')
+        self._adverb_opening = re.compile(r'[A-Z]\w+\s+\w+ly\s+')
+        self._formal_words = re.compile(r'(utilize|implement|demonstrate|facilitate)')
+    
+    @property
+    def openai(self) -> 'OpenAIHumanizer':
+        """OpenAI client, built on first use so FAST-only deployments never import openai"""
+        if self._openai is None:
+            start = time.perf_counter()
+            from .openai_client import OpenAIHumanizer
+            self._openai = OpenAIHumanizer()
+            seconds = time.perf_counter() - start
+            startup.timer.record_deferred('openai_client', seconds)
+            metrics.record_startup({'openai_client': seconds})
+        return self._openai
+    
+    @openai.setter
+    def openai(self, client: 'OpenAIHumanizer'):
+        self._openai = client
+    
+    @property
+    def openai_started(self) -> bool:
+        return self._openai is not None
+    
+    @property
+    def patterns(self):
+        """Pattern engine of the active rule set"""
+        return self.rules.current.patterns
+    
+    @property
+    def grammar(self):
+        """Grammar fixer of the active rule set"""
+        return self.rules.current.grammar
+        
+    async def humanize(self, text: str, mode: ProcessingMode = ProcessingMode.BALANCED,
+                       max_processing_time: Optional[float] = None, pack_group: Optional[int] = None,
+                       seed: Optional[int] = None) -> Dict:
+        """Main humanization method with async processing.
         
-    async def humanize(self, text: str, mode: ProcessingMode = ProcessingMode.BALANCED) -> Dict:
-        """Main humanization method with async processing"""
+        With a `seed` the regex stage draws from its own random.Random, so
+        FAST output depends only on (text, seed, rule version).
+        """
+        result = await self._humanize(text, mode, max_processing_time, pack_group, seed)
+        metrics.record_result(mode.value, result)
+        return result
+    
+    async def _humanize(self, text: str, mode: ProcessingMode, max_processing_time: Optional[float],
+                        pack_group: Optional[int], seed: Optional[int]) -> Dict:
         start_time = time.time()
+        deadline = Deadline(max_processing_time)
         
         if mode == ProcessingMode.FAST:
             # Regex only - no OpenAI
-            result_text, changes = self.patterns.apply_patterns(text)
+            if seed is not None and self.fast_cache.enabled:
+                return await self._fast_memoized(text, seed, start_time)
+            result_text, changes = await self.regex_executor.apply(text, seed)
             return self._build_response(text, result_text, changes, time.time() - start_time, "regex_only")
         
-        # Run regex patterns first (always)
-        regex_task = asyncio.create_task(self._apply_regex_async(text))
+        if mode == ProcessingMode.AGGRESSIVE and self._should_downgrade(deadline):
+            result = await self._humanize(text, ProcessingMode.BALANCED, max_processing_time, pack_group, seed)
+            result['changes_applied'].append('Downgraded to balanced: OpenAI latency')
+            return result
         
         if mode == ProcessingMode.BALANCED:
             # Selective OpenAI - only for problematic sentences
-            regex_result = await regex_task
-            needs_openai = self._needs_openai_enhancement(regex_result['text'])
+            regex_result = await self._apply_regex_async(text, seed)
+            segments = self._select_openai_spans(regex_result['text'])
+            flagged_count = sum(len(sentences) for needs_openai, sentences in segments if needs_openai)
             
-            if needs_openai:
-                openai_result = await self.openai.restructure(regex_result['text'], aggressive=False)
-                final_text = openai_result.get('text', regex_result['text'])
+            if flagged_count and not deadline.allows_openai():
+                return self._build_response(
+                    text, regex_result['text'],
+                    regex_result['changes'] + ['OpenAI skipped: deadline'],
+                    time.time() - start_time, "deadline_fallback"
+                )
+            
+            if flagged_count and not self.openai.breaker.available():
+                return self._build_response(
+                    text, regex_result['text'],
+                    regex_result['changes'] + ['OpenAI skipped: circuit open'],
+                    time.time() - start_time, "circuit_open_fallback"
+                )
+            
+            if flagged_count:
+                final_text, rewritten = await self._restructure_spans(segments, deadline, pack_group)
+                sentence_count = sum(len(sentences) for _, sentences in segments)
+                if rewritten:
+                    method = "hybrid"
+                else:
+                    method = "deadline_fallback" if deadline.expired() else "regex_fallback"
                 return self._build_response(
                     text, final_text, 
-                    regex_result['changes'] + ['OpenAI restructuring'],
-                    time.time() - start_time, "hybrid"
+                    regex_result['changes'] + [f'OpenAI restructuring: {flagged_count} of {sentence_count} sentences'],
+                    time.time() - start_time, method
                 )
             else:
                 return self._build_response(
@@ -44,82 +133,307 @@ class HybridHumanizer:
                 )
         
         else:  # AGGRESSIVE mode
+            if not deadline.allows_openai():
+                regex_result = await self._apply_regex_async(text, seed)
+                return self._build_response(
+                    text, regex_result['text'],
+                    regex_result['changes'] + ['OpenAI skipped: deadline'],
+                    time.time() - start_time, "deadline_fallback"
+                )
+            
+            if not self.openai.breaker.available():
+                regex_result = await self._apply_regex_async(text, seed)
+                return self._build_response(
+                    text, regex_result['text'],
+                    regex_result['changes'] + ['OpenAI skipped: circuit open'],
+                    time.time() - start_time, "circuit_open_fallback"
+                )
+            
             # Parallel processing for maximum speed
-            regex_task = asyncio.create_task(self._apply_regex_async(text))
-            openai_task = asyncio.create_task(self.openai.restructure(text, aggressive=True))
+            regex_task = asyncio.create_task(self._apply_regex_async(text, seed))
+            openai_task = asyncio.create_task(
+                self._restructure_chunks(text, aggressive=True, timeout=deadline.remaining(), pack_group=pack_group)
+            )
             
-            regex_result, openai_result = await asyncio.gather(regex_task, openai_task)
+            regex_result, chunks = await asyncio.gather(regex_task, openai_task)
+            failed = [result for _, _, result in chunks if 'error' in result]
+            changes = regex_result['changes'] + [f"OpenAI: {failed[0]['error'] if failed else 'success'}"]
+            if len(chunks) > 1:
+                changes.append(f"OpenAI chunks: {len(chunks) - len(failed)} of {len(chunks)} rewritten")
             
             # Use OpenAI result if successful, otherwise fallback to regex
-            if 'error' not in openai_result:
-                final_text = openai_result['text']
+            if len(failed) < len(chunks):
+                # Only the failed chunks fall back to regex, all at once
+                fallbacks = iter(await asyncio.gather(*(
+                    self._apply_regex_async(chunk, seed) for chunk, _, result in chunks if 'error' in result
+                )))
+                final_text = ''.join(
+                    (next(fallbacks) if 'error' in result else result)['text'].strip() + separator
+                    for chunk, separator, result in chunks
+                )
                 method = "openai_aggressive"
             else:
                 final_text = regex_result['text']
-                method = "regex_fallback"
+                if failed[0].get('circuit_open'):
+                    method = "circuit_open_fallback"
+                else:
+                    method = "deadline_fallback" if deadline.expired() else "regex_fallback"
             
-            return self._build_response(
-                text, final_text,
-                regex_result['changes'] + [f"OpenAI: {openai_result.get('error', 'success')}"],
-                time.time() - start_time, method
-            )
+            return self._build_response(text, final_text, changes, time.time() - start_time, method)
+    
+    async def humanize_stream(self, text: str, mode: ProcessingMode = ProcessingMode.BALANCED,
+                              max_processing_time: Optional[float] = None,
+                              seed: Optional[int] = None) -> AsyncIterator[Dict]:
+        """Yield output pieces as soon as they are ready, then a final summary event.
+        
+        Pieces are {"type": "sentence" | "token", "text": ...} and concatenate
+        into the streamed text. The closing {"type": "done", ...} event carries
+        the grammar-fixed result and metadata; clients should treat it as final.
+        """
+        start_time = time.time()
+        deadline = Deadline(max_processing_time)
+        
+        if mode == ProcessingMode.FAST:
+            sentences, changes, timings = [], [], {}
+            rng = random if seed is None else random.Random(seed)
+            for sentence, sentence_changes in self.patterns.iter_patterns(text, rng, timings):
+                yield {'type': 'sentence', 'text': (' ' if sentences else '') + sentence}
+                sentences.append(sentence)
+                changes.extend(sentence_changes)
+                await asyncio.sleep(0)  # Let the response flush between sentences
+            metrics.observe_stages(timings)
+            yield self._stream_done(text, ' '.join(sentences), changes, start_time, "regex_only", mode)
+            return
+        
+        requested_mode = mode
+        downgraded = mode == ProcessingMode.AGGRESSIVE and self._should_downgrade(deadline)
+        if downgraded:
+            mode = ProcessingMode.BALANCED
+        
+        regex_result = await self._apply_regex_async(text, seed)
+        changes = regex_result['changes'] + (['Downgraded to balanced: OpenAI latency'] if downgraded else [])
+        if mode == ProcessingMode.BALANCED:
+            spans = self._select_openai_spans(regex_result['text'])
+            segments = [(needs_openai, ' '.join(sentences), sentences) for needs_openai, sentences in spans]
+            flagged_count = sum(len(sentences) for needs_openai, sentences in spans if needs_openai)
+            sentence_count = sum(len(sentences) for _, sentences in spans)
+            summary = f'OpenAI restructuring: {flagged_count} of {sentence_count} sentences'
+            success_method = "hybrid"
+        else:  # AGGRESSIVE mode
+            segments = [(True, text, self._sentence_splitter.split(regex_result['text']))]
+            summary = "OpenAI: streamed"
+            success_method = "openai_aggressive"
+        
+        if not any(needs_openai for needs_openai, _, _ in segments):
+            method = "regex_only"
+        elif not deadline.allows_openai():
+            segments = [(False, ' '.join(fallback), fallback) for _, _, fallback in segments]
+            changes = changes + ['OpenAI skipped: deadline']
+            method = "deadline_fallback"
+        elif not self.openai.breaker.available():
+            segments = [(False, ' '.join(fallback), fallback) for _, _, fallback in segments]
+            changes = changes + ['OpenAI skipped: circuit open']
+            method = "circuit_open_fallback"
+        else:
+            changes = changes + [summary]
+            method = None
+        
+        outcome = {}
+        async for event in self._stream_segments(segments, mode == ProcessingMode.AGGRESSIVE,
+                                                 deadline.remaining(), outcome):
+            yield event
+        
+        if method is None:
+            if outcome['rewritten']:
+                method = success_method
+            else:
+                method = "deadline_fallback" if deadline.expired() else "regex_fallback"
+        yield self._stream_done(text, outcome['text'], changes, start_time, method, requested_mode)
+    
+    async def _stream_segments(self, segments: List[Tuple[bool, str, List[str]]], aggressive: bool,
+                               timeout: Optional[float], outcome: Dict) -> AsyncIterator[Dict]:
+        """Relay (send_to_openai, source, fallback_sentences) segments in order.
+        
+        All OpenAI streams start at once; later segments are buffered until
+        the ones before them have been sent.
+        """
+        queues = {}
+        tasks = []
+        for index, (needs_openai, source, _) in enumerate(segments):
+            if needs_openai:
+                queues[index] = asyncio.Queue()
+                tasks.append(asyncio.create_task(self._pump_stream(source, aggressive, timeout, queues[index])))
+        
+        pieces = []
+        rewritten = 0
+        try:
+            for index, (needs_openai, source, fallback) in enumerate(segments):
+                separator = ' ' if index else ''
+                received = []
+                failed = False
+                
+                if needs_openai:
+                    while True:
+                        item = await queues[index].get()
+                        if item is None or isinstance(item, Exception):
+                            failed = item is not None
+                            break
+                        yield {'type': 'token', 'text': ('' if received else separator) + item}
+                        received.append(item)
+                
+                if received and not failed:
+                    pieces.append(''.join(received).strip())
+                    rewritten += 1
+                    continue
+                
+                # Regex output stands in for this segment; nothing to resend if tokens already went out
+                if not received:
+                    for position, sentence in enumerate(fallback):
+                        yield {'type': 'sentence', 'text': (' ' if position else separator) + sentence}
+                pieces.append(' '.join(fallback))
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        outcome['text'] = ' '.join(pieces)
+        outcome['rewritten'] = rewritten
+    
+    async def _pump_stream(self, text: str, aggressive: bool, timeout: Optional[float], queue: asyncio.Queue):
+        """Feed OpenAI deltas into a queue, ending with None or the raised exception"""
+        try:
+            async for delta in self.openai.restructure_stream(text, aggressive=aggressive, timeout=timeout):
+                queue.put_nowait(delta)
+            queue.put_nowait(None)
+        except Exception as e:
+            queue.put_nowait(e)
+    
+    def _stream_done(self, original: str, humanized: str, changes: List[str],
+                     start_time: float, method: str, mode: ProcessingMode) -> Dict:
+        response = self._build_response(original, humanized, changes, time.time() - start_time, method)
+        metrics.record_result(mode.value, response)
+        return {'type': 'done', **response}
     
-    async def _apply_regex_async(self, text: str) -> Dict:
+    async def _apply_regex_async(self, text: str, seed: Optional[int] = None) -> Dict:
         """Apply regex patterns asynchronously"""
-        # Run in executor to not block event loop
-        loop = asyncio.get_event_loop()
-        result_text, changes = await loop.run_in_executor(
-            None, self.patterns.apply_patterns, text
-        )
+        # Long texts run off the event loop, short ones inline (see RegexExecutor)
+        result_text, changes = await self.regex_executor.apply(text, seed)
         return {'text': result_text, 'changes': changes}
     
+    async def _fast_memoized(self, text: str, seed: int, start_time: float) -> Dict:
+        """Seeded FAST response, reused when the same text and seed were seen under the same rules"""
+        version = self.rules.current.version
+        key = self.fast_cache.make_key(text, seed, version)
+        cached = self.fast_cache.get(key, version)
+        if cached is not None:
+            return self._from_memo(cached, start_time)
+        
+        result_text, changes = await self.regex_executor.apply(text, seed)
+        result = self._build_response(text, result_text, changes, time.time() - start_time, "regex_only")
+        self._remember_fast(key, version, result, time.time() - start_time)
+        return result
+    
+    def _remember_fast(self, key: str, version: str, result: Dict, cost: float):
+        # Skip results computed while the rules were being swapped
+        if self.rules.current.version == version:
+            self.fast_cache.set(key, version, result, cost)
+    
+    def _from_memo(self, cached: Dict, start_time: float) -> Dict:
+        return {
+            **cached,
+            'changes_applied': list(cached['changes_applied']),
+            'processing_time_ms': (time.time() - start_time) * 1000,
+        }
+    
     def _needs_openai_enhancement(self, text: str) -> bool:
         """Determine if text needs OpenAI enhancement"""
-        # Check for AI detection indicators
-        indicators = {
-            'perfect_sentences': len(re.findall(r'[.!?]\s+[A-Z]\w+\s+\w+ly\s+', text)),
-            'repetitive_structure': self._check_repetitive_structure(text),
-            'lacks_which_clauses': text.count('which') < 1,
-            'formal_tone': len(re.findall(r'(utilize|implement|demonstrate|facilitate)', text)) > 2
-        }
+        return needs_enhancement(extract_features(text))
+    
+    def _select_openai_spans(self, text: str) -> List[Tuple[bool, List[str]]]:
+        """Group sentences into runs that do or do not need OpenAI enhancement"""
+        segments = []
+        seen_openings = set()
         
-        score = sum([
-            indicators['perfect_sentences'] > 1,
-            indicators['repetitive_structure'],
-            indicators['lacks_which_clauses'],
-            indicators['formal_tone']
-        ])
+        for sentence in self._sentence_splitter.split(text):
+            opening = ' '.join(sentence.split()[:3])
+            score = sum([
+                bool(self._adverb_opening.match(sentence)),
+                opening in seen_openings,
+                bool(self._formal_words.search(sentence))
+            ])
+            seen_openings.add(opening)
+            
+            needs_openai = score >= 2  # Same threshold as _needs_openai_enhancement
+            if segments and segments[-1][0] == needs_openai:
+                segments[-1][1].append(sentence)
+            else:
+                segments.append((needs_openai, [sentence]))
         
-        return score >= 2  # Needs enhancement if 2+ indicators present
+        return segments
+    
+    def _should_downgrade(self, deadline: Deadline) -> bool:
+        """Is OpenAI currently too slow for a full rewrite within this request's budget"""
+        remaining = deadline.remaining()
+        return self.openai.breaker.too_slow_for(self.openai.timeout if remaining is None else remaining)
     
-    def _check_repetitive_structure(self, text: str) -> bool:
-        """Check if sentences have similar structure"""
-        sentences = re.split(r'[.!?]+', text)
-        if len(sentences) < 3:
-            return False
+    async def _restructure_spans(self, segments: List[Tuple[bool, List[str]]], deadline: Deadline,
+                                 pack_group: Optional[int] = None) -> Tuple[str, int]:
+        """Rewrite flagged spans concurrently and splice them back in order"""
+        spans = [' '.join(sentences) for _, sentences in segments]
+        flagged = [span for (needs_openai, _), span in zip(segments, spans) if needs_openai]
+        timeout = deadline.remaining()
+        results = iter(await asyncio.gather(
+            *(self._restructure_chunks(span, aggressive=False, timeout=timeout, pack_group=pack_group)
+              for span in flagged)
+        ))
         
-        # Check first 3 words of each sentence
-        structures = []
-        for sent in sentences[:3]:
-            words = sent.strip().split()[:3]
-            if words:
-                structures.append(' '.join(words))
+        pieces = []
+        rewritten = 0
+        for (needs_openai, _), span in zip(segments, spans):
+            if needs_openai:
+                chunks = next(results)
+                if any('error' not in result for _, _, result in chunks):
+                    rewritten += 1
+                span = ''.join((chunk if 'error' in result else result['text'].strip()) + separator
+                               for chunk, separator, result in chunks)
+            pieces.append(span)
         
-        return len(set(structures)) < len(structures) * 0.7
+        return ' '.join(pieces), rewritten
+    
+    async def _restructure_chunks(self, text: str, aggressive: bool, timeout: Optional[float],
+                                  pack_group: Optional[int] = None) -> List[Tuple[str, str, Dict]]:
+        """Restructure text as paragraph-aligned chunks of at most CHUNK_MAX_TOKENS, all at once.
+        
+        Each chunk after the first is sent with the last sentences before it
+        as context, so the rewrites join up. Returns (chunk, separator after
+        it, restructure result) in text order; short texts are one chunk.
+        """
+        chunks = split_chunks(text, self.chunk_max_tokens)
+        results = await asyncio.gather(*(
+            self.openai.restructure(
+                chunk, aggressive=aggressive, timeout=timeout,
+                pack_group=pack_group if len(chunks) == 1 else None,
+                context=tail_context(chunks[index - 1][0]) if index else None
+            )
+            for index, (chunk, _) in enumerate(chunks)
+        ))
+        return [(chunk, separator, result) for (chunk, separator), result in zip(chunks, results)]
     
     def _build_response(self, original: str, humanized: str, changes: List[str], 
                        processing_time: float, method: str) -> Dict:
         """Build standardized response"""
         
         # Apply grammar and typo fixes before finalizing
-        fixed_text, grammar_fixes = self._fix_grammar_and_typos(humanized)
+        with metrics.timed('typo_fixes'):
+            fixed_text, grammar_fixes = self._fix_grammar_and_typos(humanized)
         all_changes = changes + grammar_fixes
+        with metrics.timed('detection'):
+            detection = self._estimate_ai_detection(fixed_text)
         
         return {
             'original': original,
             'humanized': fixed_text,
             'processing_time_ms': processing_time * 1000,
-            'ai_detection_estimate': self._estimate_ai_detection(fixed_text),
+            'ai_detection_estimate': detection,
             'method_used': method,
             'changes_applied': all_changes,
             'word_count_change': len(fixed_text.split()) - len(original.split())
@@ -127,37 +441,116 @@ class HybridHumanizer:
     
     def _estimate_ai_detection(self, text: str) -> float:
         """Estimate AI detection probability based on patterns"""
-        score = 100  # Start with 100% (definitely AI)
+        return detection_score(extract_features(text))
+
+    def stats(self) -> Dict:
+        """Runtime counters for the /stats endpoint"""
+        stats = {
+            'regex_executor': self.regex_executor.stats(),
+            'fast_cache': self.fast_cache.stats(),
+            'openai_cache': None,
+            'openai_inflight': None,
+            'openai_rate_limits': None,
+            'batch_scheduler': self.scheduler.stats(),
+            'rules': self.rules.stats(),
+            'startup': startup.timer.report(),
+        }
+        if self.openai_started:  # Reporting must not build the client
+            stats['openai_cache'] = self.openai.cache.stats()
+            stats['openai_inflight'] = self.openai.inflight.stats()
+            stats['openai_rate_limits'] = self.openai.stats()
+        return stats
+
+    async def batch_humanize(self, texts: List[str], mode: ProcessingMode = ProcessingMode.BALANCED,
+                             seed: Optional[int] = None, seeds: Optional[List[Optional[int]]] = None) -> List[Dict]:
+        """Process multiple texts in parallel; a seed applies to each text independently.
+        
+        `seeds`, one per text, overrides `seed` when texts need different ones.
+        """
+        if seeds is None:
+            seeds = [seed] * len(texts)
+        if mode == ProcessingMode.FAST:
+            # Ship the whole batch (minus memoized texts) to the regex executor in one go
+            start_time = time.time()
+            results = [None] * len(texts)
+            pending = list(range(len(texts)))
+            keys = {}
+            if self.fast_cache.enabled:
+                version = self.rules.current.version
+                pending = []
+                for index, (text, text_seed) in enumerate(zip(texts, seeds)):
+                    cached = None
+                    if text_seed is not None:  # Only seeded output is reproducible enough to reuse
+                        keys[index] = self.fast_cache.make_key(text, text_seed, version)
+                        cached = self.fast_cache.get(keys[index], version)
+                    if cached is None:
+                        pending.append(index)
+                    else:
+                        results[index] = self._from_memo(cached, start_time)
+            
+            if pending:
+                transformed = await self.regex_executor.apply_many([texts[i] for i in pending],
+                                                                   seeds=[seeds[i] for i in pending])
+                # Each text is charged its share of the shared regex pass plus its own finishing time
+                share = (time.time() - start_time) / len(pending)
+                for index, (result_text, changes) in zip(pending, transformed):
+                    item_start = time.time()
+                    result = self._build_response(texts[index], result_text, changes, share, "regex_only")
+                    cost = share + time.time() - item_start
+                    result['processing_time_ms'] = cost * 1000
+                    results[index] = result
+                    if index in keys:
+                        self._remember_fast(keys[index], version, result, cost)
+            for result in results:
+                metrics.record_result(mode.value, result)
+            return results
         
-        # Reduce score for human-like patterns
-        score -= len(re.findall(r'which', text)) * 15
-        score -= len(re.findall(r'together with|as well as', text)) * 10
-        score -= 20 if not re.match(r'^(The|An?|I|We|My)', text) else 0
-        score -= len(re.findall(r'enables \w+ to|benefits come from', text)) * 10
-        score -= 10 if re.search(r'people|persons', text) else 0
+        results = [None] * len(texts)
+        async for index, result in self.iter_batch(texts, mode, seeds=seeds):
+            results[index] = result
+        return results
+    
+    async def iter_batch(self, texts: List[str], mode: ProcessingMode = ProcessingMode.BALANCED,
+                         seed: Optional[int] = None,
+                         seeds: Optional[List[Optional[int]]] = None) -> AsyncIterator[Tuple[int, Dict]]:
+        """Yield (index, result) pairs in completion order under the shared batch concurrency limit"""
+        if seeds is None:
+            seeds = [seed] * len(texts)
+        units = self._pack_units(texts, mode)
         
-        # Check for natural flow breaks
-        sentences = text.split('.')
-        if any(len(s.split()) > 25 for s in sentences):  # Long, winding sentences
-            score -= 15
+        async def run_unit(unit: Tuple[Optional[int], List[int]]) -> List[Dict]:
+            # Texts in a unit run together so their OpenAI calls land in the same pack
+            pack_group, indices = unit
+            return await asyncio.gather(*(self.humanize(texts[i], mode, pack_group=pack_group, seed=seeds[i])
+                                          for i in indices))
         
-        return max(0, min(100, score))
-
-    async def batch_humanize(self, texts: List[str], mode: ProcessingMode = ProcessingMode.BALANCED) -> List[Dict]:
-        """Process multiple texts in parallel"""
-        tasks = [self.humanize(text, mode) for text in texts]
-        return await asyncio.gather(*tasks)
+        async for unit_index, results in self.scheduler.run(units, run_unit):
+            for index, result in zip(units[unit_index][1], results):
+                yield index, result
+    
+    def _pack_units(self, texts: List[str], mode: ProcessingMode) -> List[Tuple[Optional[int], List[int]]]:
+        """Group short texts into (pack_group, indices) units; long texts get a unit of their own"""
+        if mode == ProcessingMode.FAST:  # Nothing to pack, and FAST must not build the OpenAI client
+            return [(None, [index]) for index in range(len(texts))]
+        units = []
+        current = []
+        current_chars = 0
+        budget = self.openai.packer.max_tokens * 4 // 3  # Leave room for the prompt and the rewrite
+        
+        for index, text in enumerate(texts):
+            if not self.openai.can_pack(text):
+                units.append((None, [index]))
+                continue
+            if current and (len(current) >= self.openai.packer.max_items or current_chars + len(text) > budget):
+                units.append((next(self._pack_groups), current))
+                current, current_chars = [], 0
+            current.append(index)
+            current_chars += len(text)
+        if current:
+            units.append((next(self._pack_groups), current))
+        
+        return units
 
     def _fix_grammar_and_typos(self, text: str) -> tuple[str, List[str]]:
         """Fix common grammatical errors and typos introduced by transformations."""
-        modified_text = text
-        fixes_applied = []
-        
-        for pattern, replacement in TYPO_RULES:
-            old_text = modified_text
-            modified_text = re.sub(pattern, replacement, modified_text, flags=re.IGNORECASE)
-            
-            if old_text != modified_text:
-                fixes_applied.append(f"Grammar fix: {pattern} → {replacement}")
-        
-        return modified_text, fixes_applied 
\ No newline at end of file
+        return self.grammar.fix(text)
@@ -0,0 +1,200 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from .models import ProcessingMode
+
+JOB_TTL = float(os.getenv('JOB_TTL', '3600'))
+
+
+class MemoryJobBackend:
+    """Job queue and storage kept in this process"""
+
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._jobs: Dict[str, Dict] = {}
+
+    async def create(self, job_id: str, texts: List[str], meta: Dict):
+        self._prune()
+        self._jobs[job_id] = {'meta': dict(meta), 'texts': texts, 'results': {}}
+
+    async def enqueue(self, job_id: str):
+        self._queue.put_nowait(job_id)
+
+    async def dequeue(self) -> str:
+        return await self._queue.get()
+
+    async def get_meta(self, job_id: str) -> Optional[Dict]:
+        job = self._jobs.get(job_id)
+        return dict(job['meta']) if job else None
+
+    async def get_texts(self, job_id: str) -> List[str]:
+        return self._jobs[job_id]['texts']
+
+    async def update(self, job_id: str, **fields):
+        self._jobs[job_id]['meta'].update(fields)
+
+    async def add_result(self, job_id: str, index: int, result: Dict):
+        job = self._jobs[job_id]
+        job['results'][index] = result
+        job['meta']['completed'] += 1
+
+    async def get_results(self, job_id: str, offset: int, limit: int) -> List[Dict]:
+        results = self._jobs[job_id]['results']
+        end = min(offset + limit, self._jobs[job_id]['meta']['total'])
+        return [{'index': i, 'result': results[i]} for i in range(offset, end) if i in results]
+
+    async def close(self):
+        pass
+
+    def _prune(self):
+        now = time.time()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job['meta'].get('finished_at') and now - job['meta']['finished_at'] > JOB_TTL]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+class RedisJobBackend:
+    """Job queue and storage in Redis, so any instance's workers can pick jobs up"""
+
+    QUEUE_KEY = 'humanizer:jobs:queue'
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis_asyncio
+        self._redis = redis_asyncio.from_url(url, decode_responses=True)
+
+    def _key(self, job_id: str, part: str = 'meta') -> str:
+        return f'humanizer:job:{job_id}:{part}'
+
+    async def create(self, job_id: str, texts: List[str], meta: Dict):
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self._key(job_id), mapping={key: json.dumps(value) for key, value in meta.items()})
+            pipe.rpush(self._key(job_id, 'texts'), *texts)
+            await pipe.execute()
+
+    async def enqueue(self, job_id: str):
+        await self._redis.rpush(self.QUEUE_KEY, job_id)
+
+    async def dequeue(self) -> str:
+        _, job_id = await self._redis.blpop(self.QUEUE_KEY)
+        return job_id
+
+    async def get_meta(self, job_id: str) -> Optional[Dict]:
+        raw = await self._redis.hgetall(self._key(job_id))
+        return {key: json.loads(value) for key, value in raw.items()} if raw else None
+
+    async def get_texts(self, job_id: str) -> List[str]:
+        return await self._redis.lrange(self._key(job_id, 'texts'), 0, -1)
+
+    async def update(self, job_id: str, **fields):
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self._key(job_id), mapping={key: json.dumps(value) for key, value in fields.items()})
+            if 'finished_at' in fields:  # Like MemoryJobBackend, jobs expire JOB_TTL after they finish
+                for part in ('meta', 'texts', 'results'):
+                    pipe.expire(self._key(job_id, part), int(JOB_TTL))
+            await pipe.execute()
+
+    async def add_result(self, job_id: str, index: int, result: Dict):
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self._key(job_id, 'results'), str(index), json.dumps(result))
+            pipe.hincrby(self._key(job_id), 'completed', 1)
+            await pipe.execute()
+
+    async def get_results(self, job_id: str, offset: int, limit: int) -> List[Dict]:
+        indices = [str(i) for i in range(offset, offset + limit)]
+        if not indices:
+            return []
+        values = await self._redis.hmget(self._key(job_id, 'results'), indices)
+        return [{'index': int(i), 'result': json.loads(value)} for i, value in zip(indices, values) if value]
+
+    async def close(self):
+        await self._redis.close()
+
+
+class JobManager:
+    """Accepts large batches, processes them with background workers and reports progress"""
+
+    def __init__(self, humanizer, backend=None, workers: Optional[int] = None, chunk_size: Optional[int] = None):
+        self.humanizer = humanizer
+        if backend is None:
+            backend = self._default_backend()
+        self.backend = backend
+        self.workers = workers or int(os.getenv('JOB_WORKERS', '2'))
+        self.chunk_size = chunk_size or int(os.getenv('JOB_CHUNK_SIZE', '100'))
+        self._tasks: List[asyncio.Task] = []
+
+    @staticmethod
+    def _default_backend():
+        if os.getenv('JOB_BACKEND', 'memory') == 'redis':
+            return RedisJobBackend(os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+        return MemoryJobBackend()
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.backend.close()
+
+    async def submit(self, texts: List[str], mode: str, seed: Optional[int] = None) -> Dict:
+        job_id = uuid.uuid4().hex
+        meta = {
+            'status': 'queued',
+            'mode': mode,
+            'seed': seed,
+            'total': len(texts),
+            'completed': 0,
+            'created_at': time.time(),
+        }
+        await self.backend.create(job_id, texts, meta)
+        await self.backend.enqueue(job_id)
+        self.start()
+        return {'job_id': job_id, **meta}
+
+    async def status(self, job_id: str, offset: int = 0, limit: int = 100) -> Optional[Dict]:
+        meta = await self.backend.get_meta(job_id)
+        if meta is None:
+            return None
+        results = await self.backend.get_results(job_id, offset, limit)
+        next_offset = offset + limit
+        return {
+            'job_id': job_id,
+            **meta,
+            'progress': meta['completed'] / meta['total'] if meta['total'] else 1.0,
+            'results': results,
+            'offset': offset,
+            'next_offset': next_offset if next_offset < meta['total'] else None,
+        }
+
+    async def _worker(self):
+        while True:
+            job_id = await self.backend.dequeue()
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                await self.backend.update(job_id, status='failed', error=str(e), finished_at=time.time())
+
+    async def _run(self, job_id: str):
+        meta = await self.backend.get_meta(job_id)
+        if meta is None:  # Expired before a worker got to it
+            return
+        texts = await self.backend.get_texts(job_id)
+        await self.backend.update(job_id, status='running', started_at=time.time())
+
+        # Chunks keep the number of in-flight tasks bounded for very large jobs
+        for offset in range(0, len(texts), self.chunk_size):
+            chunk = texts[offset:offset + self.chunk_size]
+            async for index, result in self.humanizer.iter_batch(chunk, ProcessingMode(meta['mode']), meta.get('seed')):
+                await self.backend.add_result(job_id, offset + index, result)
+
+        await self.backend.update(job_id, status='completed', finished_at=time.time())
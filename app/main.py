@@ -1,39 +1,95 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from prometheus_fastapi_instrumentator import Instrumentator
 from contextlib import asynccontextmanager
 import os
+import asyncio
 from dotenv import load_dotenv
 import time
 from typing import Dict
-import re
 
-from .models import HumanizeRequest, HumanizeResponse, BatchHumanizeRequest, ProcessingMode
+from .models import HumanizeRequest, HumanizeResponse, BatchHumanizeRequest, JobRequest, AnalyzeBatchRequest, DocumentRevisionRequest, ProcessingMode
 from .humanizer import HybridHumanizer
+from .jobs import JobManager
+from .documents import IncrementalHumanizer
+from .detection import analyze, analyze_batch
+from .backend_spec import check_backend_spec
+from . import metrics, startup
+from .responses import FastJSONResponse, dumps, slim
 
 # Load environment variables
 load_dotenv()
 
+startup.timer.mark("imports")
+
 # Global humanizer instance
 humanizer = None
+jobs = None
+documents = None
+openai_warm_up_error = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
-    global humanizer
+    global humanizer, jobs, documents
+    startup.timer.mark("server")
+    # The client itself is built later, so catch a misconfigured backend now rather than on the first request
+    for spec in (os.getenv("LLM_BACKEND", "openai"), os.getenv("HEDGE_BACKEND")):
+        if spec:
+            check_backend_spec(spec)
     humanizer = HybridHumanizer()
-    print("Humanizer initialized")
+    startup.timer.mark("humanizer")
+    await humanizer.regex_executor.ensure_started()
+    jobs = JobManager(humanizer)
+    jobs.start()
+    documents = IncrementalHumanizer(humanizer)
+    rules_watch_interval = float(os.getenv("RULES_WATCH_INTERVAL", "0"))
+    rules_watcher = asyncio.create_task(humanizer.rules.watch(rules_watch_interval)) if rules_watch_interval > 0 else None
+    ready = startup.timer.finish("workers")
+    metrics.record_startup(startup.timer.phases)
+    print(f"Humanizer initialized (rules {humanizer.rules.current.version}) in {ready * 1000:.0f}ms")
+    # The OpenAI client is built on first non-FAST use; warming it up is left off the startup path
+    warm_connections = int(os.getenv("OPENAI_WARM_CONNECTIONS", "2"))
+    openai_warmer = asyncio.create_task(warm_up_openai(warm_connections)) if os.getenv("OPENAI_API_KEY") and warm_connections > 0 else None
+    if openai_warmer is not None:
+        openai_warmer.add_done_callback(warm_up_done)
     yield
     # Shutdown
+    for task in (rules_watcher, openai_warmer):
+        if task is not None:
+            task.cancel()
+    await jobs.stop()
+    humanizer.regex_executor.shutdown()
+    if humanizer.openai_started:
+        await humanizer.openai.cache.close()
+        await humanizer.openai.close()
     print("Shutting down")
 
+async def warm_up_openai(connections: int):
+    warm_up = await humanizer.openai.warm_up(connections)
+    print(f"OpenAI connections warmed: {warm_up['succeeded']}/{warm_up['connections']} in {warm_up['ms']:.0f}ms")
+
+def warm_up_done(task: asyncio.Task):
+    """Log a warm-up that raised (e.g. the client could not be built) and report it in /health"""
+    global openai_warm_up_error
+    if task.cancelled() or task.exception() is None:
+        return
+    openai_warm_up_error = str(task.exception())
+    print(f"OpenAI warm-up failed: {openai_warm_up_error}")
+
 # Create FastAPI app
 app = FastAPI(
     title="AI Text Humanizer API",
     description="Advanced text humanization using hybrid regex + OpenAI approach",
     version="2.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
+# Prometheus metrics: HTTP request metrics plus the humanizer's own (see app/metrics.py)
+Instrumentator().instrument(app).expose(app, endpoint="/metrics")
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -49,8 +105,15 @@ async def root():
         "message": "AI Text Humanizer API v2.0",
         "endpoints": {
             "/humanize": "Single text humanization",
+            "/humanize/stream": "Streaming humanization (NDJSON)",
             "/batch": "Batch text processing",
+            "/batch/stream": "Batch processing with results streamed as they complete",
+            "/jobs": "Queue a large batch and poll /jobs/{job_id} for progress and results",
+            "/documents/{document_id}/revisions": "Re-humanize an edited document, reprocessing only changed sentences",
             "/health": "Health check",
+            "/stats": "Cache and executor counters",
+            "/metrics": "Prometheus metrics, including per-stage latency histograms",
+            "/rules/reload": "Recompile the rule pack and swap it in without a restart",
             "/test": "Test with sample text"
         }
     }
@@ -65,18 +128,36 @@ async def humanize_text(request: HumanizeRequest):
     - **aggressive**: Full OpenAI restructuring (~200ms)
     """
     try:
-        result = await humanizer.humanize(request.text, request.mode)
+        result = await humanizer.humanize(request.text, request.mode, request.max_processing_time, seed=request.seed)
         
         # Check if we met the target detection rate
         if result['ai_detection_estimate'] > request.target_detection_rate:
             # Log for analysis
             print(f"Warning: Detection rate {result['ai_detection_estimate']}% exceeds target {request.target_detection_rate}%")
         
-        return HumanizeResponse(**result)
+        # Returned as a response directly: the dict is already in HumanizeResponse's shape, so skip re-validating it
+        return FastJSONResponse(slim(result, request.include_original, request.changes_format))
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/humanize/stream")
+async def humanize_text_stream(request: HumanizeRequest):
+    """
+    Stream a humanization as newline-delimited JSON.
+    
+    Regex-transformed sentences and OpenAI tokens are sent as they become
+    available; the last line is a `done` event with the final text,
+    `ai_detection_estimate` and `changes_applied`.
+    """
+    async def events():
+        async for event in humanizer.humanize_stream(request.text, request.mode, request.max_processing_time, request.seed):
+            if event['type'] == 'done':
+                event = slim(event, request.include_original, request.changes_format)
+            yield dumps(event) + "\n"
+    
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
 @app.post("/batch")
 async def batch_humanize(request: BatchHumanizeRequest):
     """
@@ -84,23 +165,91 @@ async def batch_humanize(request: BatchHumanizeRequest):
     """
     try:
         if request.parallel_processing:
-            results = await humanizer.batch_humanize(request.texts, request.mode)
+            results = await humanizer.batch_humanize(request.texts, request.mode, request.seed)
         else:
             # Sequential processing if requested
             results = []
             for text in request.texts:
-                result = await humanizer.humanize(text, request.mode)
+                result = await humanizer.humanize(text, request.mode, seed=request.seed)
                 results.append(result)
         
-        return {
-            "results": results,
+        return FastJSONResponse({
+            "results": [slim(result, request.include_original, request.changes_format) for result in results],
             "total_texts": len(request.texts),
             "average_detection_rate": sum(r['ai_detection_estimate'] for r in results) / len(results)
-        }
+        })
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/batch/stream")
+async def batch_humanize_stream(request: BatchHumanizeRequest):
+    """
+    Process a batch and stream each result as newline-delimited JSON as soon as it completes.
+    
+    Lines look like `{"index": 3, "result": {...}}`; the last line is a
+    `done` summary.
+    """
+    async def events():
+        total_detection = 0.0
+        async for index, result in humanizer.iter_batch(request.texts, request.mode, request.seed):
+            total_detection += result['ai_detection_estimate']
+            yield dumps({"index": index, "result": slim(result, request.include_original, request.changes_format)}) + "\n"
+        yield dumps({
+            "type": "done",
+            "total_texts": len(request.texts),
+            "average_detection_rate": total_detection / len(request.texts)
+        }) + "\n"
+    
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@app.post("/jobs", status_code=202)
+async def create_job(request: JobRequest):
+    """
+    Queue up to 10,000 texts for background processing.
+    
+    Returns a `job_id` immediately; poll `/jobs/{job_id}` for progress and results.
+    """
+    job = await jobs.submit(request.texts, request.mode.value, request.seed)
+    return {"job_id": job['job_id'], "status": job['status'], "total": job['total']}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, offset: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000)):
+    """
+    Job status, progress and one page of results (`offset`/`limit`, in input order).
+    """
+    job = await jobs.status(job_id, offset, limit)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.post("/documents/{document_id}/revisions")
+async def revise_document(document_id: str, request: DocumentRevisionRequest):
+    """
+    Humanize a new revision of a document, reprocessing only the sentences that changed.
+    
+    The previous revision's input and output are kept per `document_id`;
+    unchanged sentences reuse their earlier output, so the work per call
+    follows the size of the edit rather than of the document.
+    """
+    try:
+        return await documents.revise(document_id, request.text, request.mode, request.seed)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/documents/{document_id}")
+async def get_document(document_id: str):
+    """Latest humanized revision of a document"""
+    document = documents.get(document_id)
+    if document is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return document
+
+@app.delete("/documents/{document_id}", status_code=204)
+async def delete_document(document_id: str):
+    if not documents.delete(document_id):
+        raise HTTPException(status_code=404, detail="Document not found")
+
 @app.get("/test")
 async def test_humanization():
     """
@@ -129,43 +278,55 @@ async def test_humanization():
 
 @app.get("/health")
 async def health_check():
-    """Check API health and OpenAI connectivity"""
+    """Check API health and OpenAI connectivity from the outcomes of recent calls"""
+    # None until the client exists and a call (or the startup warm-up) has finished
+    openai_health = humanizer.openai.health.report() if humanizer.openai_started else None
+    connected = (openai_health["connected"] if openai_health else None) if os.getenv("OPENAI_API_KEY") else False
+    degraded = os.getenv("OPENAI_API_KEY") and (connected is False or openai_warm_up_error is not None)
     health_status = {
-        "status": "healthy",
+        "status": "degraded" if degraded else "healthy",
         "regex_engine": "operational",
-        "openai_connected": False,
+        "openai_connected": connected,
+        "openai": openai_health,
+        "openai_warm_up_error": openai_warm_up_error,
         "environment": os.getenv("ENVIRONMENT", "production")
     }
     
-    # Test OpenAI connection
-    if os.getenv("OPENAI_API_KEY"):
-        try:
-            test_result = await humanizer.openai.restructure("Test", aggressive=False)
-            health_status["openai_connected"] = 'error' not in test_result
-        except:
-            health_status["openai_connected"] = False
-    
     return health_status
 
+@app.get("/stats")
+async def stats():
+    """Runtime counters (cache hit rates, executor configuration)"""
+    return {**humanizer.stats(), "documents": documents.stats() if documents else None}
+
+@app.post("/rules/reload")
+async def reload_rules():
+    """
+    Recompile the rule pack (`RULES_PATH`) and atomically swap it in.
+    
+    Requests in flight are not interrupted. An invalid pack is rejected
+    with 400 and the current rules stay active.
+    """
+    try:
+        return await humanizer.rules.reload()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except OSError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/analyze")
 async def analyze_text(text: str):
     """
     Analyze text for AI detection indicators without modifying it.
     """
-    detection_score = humanizer._estimate_ai_detection(text)
-    needs_enhancement = humanizer._needs_openai_enhancement(text)
-    
-    return {
-        "text": text,
-        "ai_detection_estimate": detection_score,
-        "needs_enhancement": needs_enhancement,
-        "indicators": {
-            "has_which_clauses": text.count("which") > 0,
-            "varied_conjunctions": len(set(re.findall(r'\b(and|together with|as well as|while)\b', text))) > 1,
-            "natural_opening": not re.match(r'^(The|An?|This|It) \w+ (is|are|was|were)', text),
-            "sentence_variety": len(set([len(s.split()) for s in text.split('.')])) > 2
-        }
-    }
+    return analyze(text)
+
+@app.post("/analyze/batch")
+async def analyze_batch_texts(request: AnalyzeBatchRequest):
+    """
+    Analyze many texts at once; scoring runs over all of them together.
+    """
+    return {"results": analyze_batch(request.texts)}
 
 # Background task for logging
 async def log_request(request_data: Dict):
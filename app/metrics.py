@@ -0,0 +1,68 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# From sub-millisecond regex stages up to a full OpenAI timeout
+_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+STAGE_SECONDS = Histogram(
+    'humanizer_stage_seconds', 'Time spent in each pipeline stage', ['stage'], buckets=_BUCKETS)
+REQUESTS = Counter(
+    'humanizer_requests_total', 'Humanized texts by requested mode and method used', ['mode', 'method'])
+FALLBACKS = Counter(
+    'humanizer_fallbacks_total', 'Responses that fell back to regex output, by reason', ['reason'])
+CACHE_LOOKUPS = Counter(
+    'humanizer_cache_lookups_total', 'Cache lookups by cache and result', ['cache', 'result'])
+CPU_SECONDS_SAVED = Counter(
+    'humanizer_cpu_seconds_saved', 'Compute time skipped by serving memoized results, by cache', ['cache'])
+OPENAI_CALLS = Counter(
+    'humanizer_openai_calls_total', 'OpenAI calls by backend and outcome', ['backend', 'outcome'])
+OPENAI_TOKENS = Counter(
+    'humanizer_openai_tokens_total', 'Tokens reported by the LLM backend', ['kind'])
+STARTUP_SECONDS = Gauge(
+    'humanizer_startup_seconds', 'Time spent in each startup phase, and in work deferred to first use', ['phase'])
+
+# Regex stages timed by AdvancedPatterns, in pipeline order
+REGEX_STAGES = ('sentence_split', 'sentence_patterns', 'word_patterns', 'flow_breakers')
+
+
+def observe_stage(stage: str, seconds: float):
+    STAGE_SECONDS.labels(stage).observe(seconds)
+
+
+def observe_stages(timings: Dict[str, float]):
+    for stage, seconds in timings.items():
+        STAGE_SECONDS.labels(stage).observe(seconds)
+
+
+@contextmanager
+def timed(stage: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(stage).observe(time.perf_counter() - start)
+
+
+def record_result(mode: str, result: Dict):
+    method = result['method_used']
+    REQUESTS.labels(mode, method).inc()
+    if method.endswith('_fallback'):
+        FALLBACKS.labels(method[:-len('_fallback')]).inc()
+
+
+def record_usage(response):
+    usage: Optional[object] = getattr(response, 'usage', None)
+    if usage is None:
+        return
+    for kind in ('prompt_tokens', 'completion_tokens'):
+        tokens = getattr(usage, kind, None)
+        if tokens:
+            OPENAI_TOKENS.labels(kind[:-len('_tokens')]).inc(tokens)
+
+
+def record_startup(phases: Dict[str, float]):
+    for phase, seconds in phases.items():
+        STARTUP_SECONDS.labels(phase).set(seconds)
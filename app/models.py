@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List, Literal
+from typing import Dict, Optional, List, Literal, Union
 from enum import Enum
 
 class ProcessingMode(str, Enum):
@@ -10,8 +10,11 @@ class ProcessingMode(str, Enum):
 class HumanizeRequest(BaseModel):
     text: str = Field(..., min_length=1, max_length=10000)
     mode: ProcessingMode = ProcessingMode.BALANCED
-    max_processing_time: Optional[int] = Field(500, description="Max time in ms")
+    max_processing_time: Optional[int] = Field(None, description="Max time in ms; unset leaves OpenAI calls bounded by OPENAI_TIMEOUT only")
     target_detection_rate: Optional[float] = Field(20.0, description="Target AI detection %")
+    seed: Optional[int] = Field(None, description="Seed for reproducible regex output")
+    include_original: bool = Field(True, description="Echo the input text back as `original`")
+    changes_format: Literal["list", "counts"] = Field("list", description="`counts` collapses changes_applied into {change: count}")
     
     class Config:
         schema_extra = {
@@ -24,15 +27,31 @@ class HumanizeRequest(BaseModel):
         }
 
 class HumanizeResponse(BaseModel):
-    original: str
+    original: Optional[str] = None  # Left out when include_original is false
     humanized: str
     processing_time_ms: float
     ai_detection_estimate: float
     method_used: str
-    changes_applied: List[str]
+    changes_applied: Union[List[str], Dict[str, int]]
     word_count_change: int
     
 class BatchHumanizeRequest(BaseModel):
     texts: List[str] = Field(..., min_items=1, max_items=100)
     mode: ProcessingMode = ProcessingMode.BALANCED
-    parallel_processing: bool = True 
\ No newline at end of file
+    parallel_processing: bool = True
+    seed: Optional[int] = Field(None, description="Seed applied to each text for reproducible regex output")
+    include_original: bool = Field(True, description="Echo each input text back as `original`")
+    changes_format: Literal["list", "counts"] = Field("list", description="`counts` collapses changes_applied into {change: count}")
+
+class AnalyzeBatchRequest(BaseModel):
+    texts: List[str] = Field(..., min_items=1, max_items=10000)
+
+class JobRequest(BaseModel):
+    texts: List[str] = Field(..., min_items=1, max_items=10000)
+    mode: ProcessingMode = ProcessingMode.BALANCED
+    seed: Optional[int] = Field(None, description="Seed applied to each text for reproducible regex output")
+
+class DocumentRevisionRequest(BaseModel):
+    text: str = Field(..., min_length=1, max_length=100000)
+    mode: ProcessingMode = ProcessingMode.BALANCED
+    seed: Optional[int] = Field(None, description="Seed applied to each changed sentence for reproducible regex output")
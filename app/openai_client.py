@@ -1,65 +1,138 @@
-import openai
+import httpx
 import asyncio
-from typing import Dict, Optional
+from typing import AsyncIterator, Dict, List, Optional
 import os
+import json
 import time
-from functools import lru_cache
+from .cache import ResponseCache
+from .singleflight import SingleFlight
+from .scheduler import RateLimiter, call_with_retries
+from .packing import RequestPacker
+from .transport import CallHealth, PooledTransport, request_timeout
+from .backends import Hedger, make_backend
+from .breaker import CircuitBreaker, CircuitOpenError
+from .tokens import completion_tokens, estimate_tokens
+from . import metrics
+
+# Bump whenever _get_system_prompt or _build_prompt change so cached rewrites are not reused
+PROMPT_VERSION = "1"
+
+# Quotes, commas and escaping around each text in a packed request and its JSON reply
+PACK_ITEM_OVERHEAD_TOKENS = 20
 
 class OpenAIHumanizer:
-    def __init__(self):
-        self.client = openai.AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-        self.model = os.getenv('OPENAI_MODEL', 'gpt-3.5-turbo')
+    def __init__(self, cache: Optional[ResponseCache] = None):
+        self.timeout = float(os.getenv('OPENAI_TIMEOUT', '5.0'))
+        self.transport = PooledTransport.from_env()
+        self.http_client = httpx.AsyncClient(transport=self.transport, timeout=request_timeout(self.timeout))
+        # Slow primary calls are hedged on HEDGE_BACKEND when one is configured
+        hedge_backend = os.getenv('HEDGE_BACKEND')
+        self.hedger = Hedger(
+            make_backend(os.getenv('LLM_BACKEND', 'openai'), self.http_client),
+            make_backend(hedge_backend, self.http_client) if hedge_backend else None
+        )
+        self.health = CallHealth()
+        self.breaker = CircuitBreaker()
+        self.model = self.hedger.primary.model
         self.temperature = float(os.getenv('OPENAI_TEMPERATURE', '0.9'))
+        self.cache = cache or ResponseCache()
+        self.inflight = SingleFlight()
+        self.limiter = RateLimiter()
+        self.max_retries = int(os.getenv('OPENAI_MAX_RETRIES', '3'))
+        self.retries = 0
         
-    @lru_cache(maxsize=1000)
-    def _get_cached_prompt(self, text_hash: str) -> Optional[str]:
-        """Cache common transformations"""
-        return None
+        # Short batch texts sharing a pack group are rewritten together in one completion
+        self.packing = os.getenv('OPENAI_PACKING', '1') == '1'
+        self.pack_max_chars = int(os.getenv('PACK_MAX_CHARS', '400'))
+        self.packer = RequestPacker(
+            self._send_pack,
+            window=float(os.getenv('PACK_WINDOW_MS', '20')) / 1000,
+            max_items=int(os.getenv('PACK_MAX_ITEMS', '20')),
+            max_tokens=int(os.getenv('PACK_MAX_TOKENS', '3000'))
+        )
+        self.pack_fallbacks = 0
+        self._packed_prompt_cost: Dict[bool, int] = {}
+    
+    @property
+    def client(self):
+        """The primary backend's OpenAI client"""
+        return self.hedger.primary.client
+    
+    @client.setter
+    def client(self, client):
+        self.hedger.primary.client = client
+    
+    def can_pack(self, text: str) -> bool:
+        return self.packing and len(text) <= self.pack_max_chars
     
-    async def restructure(self, text: str, aggressive: bool = False) -> Dict:
-        """Async OpenAI restructuring with NaturalWrite patterns"""
+    async def restructure(self, text: str, aggressive: bool = False, timeout: Optional[float] = None,
+                          pack_group: Optional[int] = None, context: Optional[str] = None) -> Dict:
+        """Async OpenAI restructuring with NaturalWrite patterns.
+        
+        `context` is the text just before this one (when a long text is
+        rewritten in chunks); the model reads on from it but does not rewrite it.
+        """
         start_time = time.time()
+        # Caller's remaining budget in seconds, capped at OPENAI_TIMEOUT
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
         
         # Check cache first
-        text_hash = hash(text[:100])  # Hash first 100 chars
-        cached = self._get_cached_prompt(text_hash)
-        if cached:
+        cache_key = self._cache_key(text, aggressive, context)
+        cached = await self.cache.get(cache_key)
+        if cached is not None:
             return {
                 'text': cached,
-                'processing_time': 0.001,
+                'processing_time': time.time() - start_time,
                 'from_cache': True
             }
         
-        prompt = self._build_prompt(text, aggressive)
+        # While OpenAI keeps failing, answer at once instead of waiting out the timeout
+        if not self.breaker.allow():
+            return {
+                'text': text,
+                'processing_time': time.time() - start_time,
+                'error': 'OpenAI circuit open',
+                'circuit_open': True
+            }
         
+        if pack_group is not None and context is None and self.can_pack(text):
+            factory = lambda: self._complete_packed(text, aggressive, pack_group, timeout)
+        else:
+            factory = lambda: self._complete(text, aggressive, cache_key, start_time, timeout, context)
+        
+        # Identical concurrent requests share one completion
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": self._get_system_prompt()},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=self.temperature,
-                max_tokens=int(len(text) * 1.5),
-                timeout=5.0  # 5 second timeout
-            )
+            result = await asyncio.wait_for(self.inflight.do(cache_key, factory), timeout)
+        except asyncio.TimeoutError:
+            if timeout >= self.timeout:  # Cut off by our own limit, not just the caller's short budget
+                self.breaker.record(False, timeout)
+            return {
+                'text': text,
+                'processing_time': time.time() - start_time,
+                'error': 'OpenAI timeout'
+            }
+        return dict(result)
+    
+    async def _complete(self, text: str, aggressive: bool, cache_key: str, start_time: float,
+                        timeout: float, context: Optional[str] = None) -> Dict:
+        """Run the chat completion and cache a successful result"""
+        messages = self._build_messages(text, aggressive, context)
+        max_tokens = completion_tokens(text, aggressive)
+        try:
+            backend, response = await self._create(messages, max_tokens, timeout)
             
-            restructured = response.choices[0].message.content
+            restructured = _reply_text(response)
             processing_time = time.time() - start_time
+            if backend is self.hedger.primary:  # Keys name the primary model; a hedge's answer is not its output
+                await self.cache.set(cache_key, restructured)
             
             return {
                 'text': restructured,
                 'processing_time': processing_time,
                 'from_cache': False,
-                'model_used': self.model
+                'model_used': backend.model
             }
             
-        except asyncio.TimeoutError:
-            return {
-                'text': text,
-                'processing_time': 5.0,
-                'error': 'OpenAI timeout'
-            }
         except Exception as e:
             return {
                 'text': text,
@@ -67,6 +140,192 @@ class OpenAIHumanizer:
                 'error': str(e)
             }
     
+    async def _complete_packed(self, text: str, aggressive: bool, pack_group: int, timeout: float) -> Dict:
+        # The packed prompt is shared by the whole pack; each text adds itself, its rewrite and its JSON quoting
+        tokens = estimate_tokens(text) + completion_tokens(text, aggressive) + PACK_ITEM_OVERHEAD_TOKENS
+        return await self.packer.submit((pack_group, aggressive), text, tokens, timeout,
+                                        base_tokens=self._packed_prompt_tokens(aggressive))
+    
+    def _packed_prompt_tokens(self, aggressive: bool) -> int:
+        """Tokens of a packed request's system prompt and instructions, without any texts"""
+        if aggressive not in self._packed_prompt_cost:
+            self._packed_prompt_cost[aggressive] = _request_tokens(self._build_packed_messages([], aggressive), 0)
+        return self._packed_prompt_cost[aggressive]
+    
+    async def _send_pack(self, key, texts: List[str], timeout: float) -> List[Dict]:
+        """Rewrite several texts with one completion; fall back to one call each if the reply can't be split"""
+        _, aggressive = key
+        start_time = time.time()
+        
+        if len(texts) == 1:
+            return [await self._complete(texts[0], aggressive, self._cache_key(texts[0], aggressive), start_time, timeout)]
+        
+        messages = self._build_packed_messages(texts, aggressive)
+        max_tokens = sum(completion_tokens(text, aggressive) for text in texts) + PACK_ITEM_OVERHEAD_TOKENS * len(texts)
+        try:
+            backend, response = await self._create(messages, max_tokens, timeout)
+        except Exception as e:
+            return [{'text': text, 'processing_time': time.time() - start_time, 'error': str(e)} for text in texts]
+        
+        try:
+            rewrites = _parse_packed(_reply_text(response), len(texts))
+        except ValueError:
+            self.pack_fallbacks += 1
+            return list(await asyncio.gather(*(
+                self._complete(text, aggressive, self._cache_key(text, aggressive), start_time, timeout)
+                for text in texts
+            )))
+        
+        processing_time = time.time() - start_time
+        results = []
+        for text, rewrite in zip(texts, rewrites):
+            if backend is self.hedger.primary:
+                await self.cache.set(self._cache_key(text, aggressive), rewrite)
+            results.append({
+                'text': rewrite,
+                'processing_time': processing_time,
+                'from_cache': False,
+                'model_used': backend.model,
+                'packed': len(texts)
+            })
+        return results
+    
+    async def restructure_stream(self, text: str, aggressive: bool = False,
+                                 timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """Yield the rewrite as it is generated; raises on failure so callers can fall back"""
+        timeout = self.timeout if timeout is None else min(timeout, self.timeout)
+        expires_at = time.monotonic() + timeout
+        
+        cache_key = self._cache_key(text, aggressive)
+        cached = await self.cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+        
+        if not self.breaker.allow():
+            raise CircuitOpenError("OpenAI circuit open")
+        
+        messages = self._build_messages(text, aggressive)
+        max_tokens = completion_tokens(text, aggressive)
+        start = time.monotonic()
+        pieces = []
+        finish_reason = None
+        # The breaker hears about a stream once it has ended, so one that stalls halfway counts as a failure
+        try:
+            _, stream = await asyncio.wait_for(self._create(messages, max_tokens, timeout, stream=True), timeout)
+            chunks = stream.__aiter__()
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), max(0.0, expires_at - time.monotonic()))
+                except StopAsyncIteration:
+                    break
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if chunk.choices:
+                    finish_reason = getattr(chunk.choices[0], 'finish_reason', None) or finish_reason
+                if delta:
+                    pieces.append(delta)
+                    yield delta
+        except Exception:  # Including timeouts while opening the stream or between chunks
+            self.breaker.record(False, time.monotonic() - start)
+            raise
+        self.breaker.record(True, time.monotonic() - start)
+        
+        if finish_reason == 'length':
+            raise TruncatedReplyError("OpenAI rewrite truncated at max_tokens")
+        await self.cache.set(cache_key, ''.join(pieces))
+    
+    async def _create(self, messages: List[Dict], max_tokens: int, timeout: float, **kwargs):
+        """One chat completion under the rate limiter and retries, with its outcome recorded for /health.
+
+        Returns (backend, response); streams always go to the primary backend,
+        and restructure_stream reports them to the breaker once they end.
+        """
+        streaming = bool(kwargs.get('stream'))
+        request = lambda backend, budget: backend.complete(messages, max_tokens, self.temperature, budget, **kwargs)
+        tokens = _request_tokens(messages, max_tokens)
+        # A hedge is a second request, so it is only sent when the limiter has room for it right now
+        admit = lambda: self.limiter.try_acquire(tokens)
+        start = time.monotonic()
+        try:
+            backend, response = await call_with_retries(
+                lambda: self.hedger.call(request, timeout, hedge=not streaming, admit=admit),
+                self.limiter, tokens, self.max_retries, self._count_retry
+            )
+        except Exception as e:
+            elapsed = time.monotonic() - start
+            self.health.record(e)
+            if not streaming:
+                self.breaker.record(False, elapsed)
+            metrics.observe_stage('openai_call', elapsed)
+            metrics.OPENAI_CALLS.labels(self.hedger.primary.name, 'error').inc()
+            raise
+        elapsed = time.monotonic() - start
+        self.health.record()
+        if not streaming:
+            self.breaker.record(True, elapsed)
+        metrics.observe_stage('openai_call', elapsed)
+        metrics.OPENAI_CALLS.labels(backend.name, 'success').inc()
+        metrics.record_usage(response)
+        return backend, response
+    
+    async def warm_up(self, connections: Optional[int] = None) -> Dict:
+        """Open pooled connections before the first request needs them.
+
+        Uses the free model listing endpoint, so no completion is billed.
+        """
+        if connections is None:
+            connections = int(os.getenv('OPENAI_WARM_CONNECTIONS', '2'))
+        start_time = time.time()
+        clients = [backend.client for backend in (self.hedger.primary, self.hedger.alternate)
+                   if hasattr(backend, 'client')]
+        results = await asyncio.gather(
+            *(client.models.list(timeout=request_timeout(self.timeout)) for client in clients for _ in range(connections)),
+            return_exceptions=True
+        )
+        for result in results:
+            self.health.record(result if isinstance(result, Exception) else None)
+        return {
+            'connections': len(results),
+            'succeeded': sum(not isinstance(result, Exception) for result in results),
+            'ms': (time.time() - start_time) * 1000,
+        }
+    
+    async def close(self):
+        await self.http_client.aclose()
+    
+    def _count_retry(self, error: BaseException):
+        self.retries += 1
+    
+    def stats(self) -> Dict:
+        return {
+            **self.limiter.stats(),
+            'retries': self.retries,
+            'packing': {**self.packer.stats(), 'fallbacks': self.pack_fallbacks},
+            'http_pool': self.transport.stats(),
+            'backends': self.hedger.stats(),
+            'circuit': self.breaker.stats(),
+        }
+    
+    def _cache_key(self, text: str, aggressive: bool, context: Optional[str] = None) -> str:
+        keyed = text if context is None else f"{context}\x00{text}"
+        return self.cache.make_key(keyed, self.model, self.temperature, aggressive, PROMPT_VERSION)
+    
+    def _build_messages(self, text: str, aggressive: bool, context: Optional[str] = None) -> List[Dict]:
+        prompt = self._build_prompt(text, aggressive)
+        if context:
+            prompt = (f"This text continues from: \"{context}\"\n"
+                      f"Keep the rewrite flowing on from it, but do not rewrite or repeat it.\n\n{prompt}")
+        return [
+            {"role": "system", "content": self._get_system_prompt()},
+            {"role": "user", "content": prompt}
+        ]
+    
+    def _build_packed_messages(self, texts: List[str], aggressive: bool) -> List[Dict]:
+        return [
+            {"role": "system", "content": self._get_system_prompt()},
+            {"role": "user", "content": self._build_packed_prompt(texts, aggressive)}
+        ]
+    
     def _get_system_prompt(self) -> str:
         return """You are rewriting text to match natural human writing patterns. Based on extensive research comparing AI and human writing:
 
@@ -118,4 +377,48 @@ Rewrite applying ALL changes. The opening MUST be completely different."""
 
 Original: {text}
 
-Apply these specific changes naturally.""" 
\ No newline at end of file
+Apply these specific changes naturally."""
+
+    def _build_packed_prompt(self, texts: List[str], aggressive: bool) -> str:
+        if aggressive:
+            instructions = """Completely restructure EACH text: change the opening, add "which" clauses, replace every "and", scramble word order and mix formal with casual wording."""
+        else:
+            instructions = """Lightly restructure EACH text: change just the opening phrase, add one "which" clause and use "together with" or "as well as" once, keeping the meaning intact."""
+        return f"""{instructions}
+
+Rewrite every text independently. Reply with JSON only, in exactly this shape:
+{{"rewrites": ["rewrite of text 1", "rewrite of text 2", ...]}}
+The list must contain exactly {len(texts)} strings, in the same order as the input.
+
+Texts (JSON array):
+{json.dumps(texts, ensure_ascii=False)}"""
+
+
+class TruncatedReplyError(ValueError):
+    """The completion stopped at max_tokens, so the rewrite is missing its end"""
+
+
+def _reply_text(response) -> str:
+    """The completion's text; a reply cut off at max_tokens is an error, never a rewrite to keep"""
+    choice = response.choices[0]
+    if getattr(choice, 'finish_reason', None) == 'length':
+        raise TruncatedReplyError("OpenAI rewrite truncated at max_tokens")
+    return choice.message.content
+
+
+def _request_tokens(messages: List[Dict], max_tokens: int) -> int:
+    """Token cost of a request (prompt plus completion budget) for the TPM limiter"""
+    return sum(estimate_tokens(message['content']) for message in messages) + max_tokens
+
+
+def _parse_packed(content: str, count: int) -> List[str]:
+    """Extract the rewrites from a packed reply; raises ValueError if the shape is wrong"""
+    start, end = content.find('{'), content.rfind('}')
+    if start == -1 or end < start:
+        raise ValueError("No JSON object in packed reply")
+    rewrites = json.loads(content[start:end + 1]).get('rewrites')
+    if not isinstance(rewrites, list) or len(rewrites) != count:
+        raise ValueError("Packed reply has the wrong number of rewrites")
+    if not all(isinstance(rewrite, str) and rewrite.strip() for rewrite in rewrites):
+        raise ValueError("Packed reply contains an empty rewrite")
+    return [rewrite.strip() for rewrite in rewrites]
@@ -0,0 +1,81 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class _Pack:
+    def __init__(self):
+        self.items: List[Tuple[str, asyncio.Future]] = []
+        self.tokens = 0
+        self.timeout = 0.0
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class RequestPacker:
+    """Collects short texts submitted under the same key into one upstream call.
+
+    A pack is sent when it reaches `max_items` or `max_tokens`, or `window`
+    seconds after its first text arrived. `base_tokens` is counted once per
+    pack (the shared prompt), `tokens` once per text. `send_many(key, texts, timeout)`
+    must return one result per text, in order.
+    """
+
+    def __init__(self, send_many: Callable[[Hashable, List[str], float], Awaitable[List[Any]]],
+                 window: float, max_items: int, max_tokens: int):
+        self.send_many = send_many
+        self.window = window
+        self.max_items = max_items
+        self.max_tokens = max_tokens
+        self._pending: Dict[Hashable, _Pack] = {}
+        self._tasks = set()
+        self.packs_sent = 0
+        self.items_sent = 0
+
+    async def submit(self, key: Hashable, text: str, tokens: int, timeout: float, base_tokens: int = 0) -> Any:
+        loop = asyncio.get_running_loop()
+        pack = self._pending.get(key)
+        if pack is not None and (pack.tokens + tokens > self.max_tokens or len(pack.items) >= self.max_items):
+            self._flush(key)
+            pack = None
+        if pack is None:
+            pack = self._pending[key] = _Pack()
+            pack.tokens = base_tokens
+            pack.timer = loop.call_later(self.window, self._flush, key)
+
+        future = loop.create_future()
+        pack.items.append((text, future))
+        pack.tokens += tokens
+        pack.timeout = max(pack.timeout, timeout)
+        if len(pack.items) >= self.max_items:
+            self._flush(key)
+
+        return await future
+
+    def _flush(self, key: Hashable):
+        pack = self._pending.pop(key, None)
+        if pack is None:
+            return
+        pack.timer.cancel()
+        task = asyncio.ensure_future(self._send(key, pack))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, key: Hashable, pack: _Pack):
+        self.packs_sent += 1
+        self.items_sent += len(pack.items)
+        try:
+            results = await self.send_many(key, [text for text, _ in pack.items], pack.timeout)
+        except Exception as e:
+            for _, future in pack.items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(pack.items, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict:
+        return {
+            'packs_sent': self.packs_sent,
+            'items_sent': self.items_sent,
+            'avg_items_per_pack': self.items_sent / self.packs_sent if self.packs_sent else 0.0,
+        }
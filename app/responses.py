@@ -0,0 +1,35 @@
+import json
+from collections import Counter
+from typing import Any, Dict
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+except ImportError:  # Same output, just slower to encode
+    orjson = None
+    FastJSONResponse = JSONResponse
+
+
+def dumps(value: Any) -> str:
+    """One JSON document as text, for NDJSON streams"""
+    if orjson is not None:
+        return orjson.dumps(value).decode()
+    return json.dumps(value)
+
+
+def slim(result: Dict, include_original: bool = True, changes_format: str = 'list') -> Dict:
+    """A humanize result shaped by the request's output options, without touching the original dict.
+
+    `include_original=False` drops the echoed input text; `changes_format="counts"`
+    turns changes_applied into {change: times applied}, in first-seen order.
+    """
+    if include_original and changes_format == 'list':
+        return result
+    result = dict(result)
+    if not include_original:
+        result.pop('original', None)
+    if changes_format == 'counts':
+        result['changes_applied'] = dict(Counter(result['changes_applied']))
+    return result
@@ -0,0 +1,485 @@
+import functools
+import json
+import os
+import re
+import random
+from collections import Counter
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+try:
+    from re import _parser as sre_parse
+    from re import _constants as sre_constants
+except ImportError:  # Python < 3.11
+    import sre_parse
+    import sre_constants
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(__file__), 'rulepacks', 'default.json')
+PACK_SECTIONS = ('sentence_patterns', 'word_patterns', 'flow_breakers', 'typo_rules')
+
+
+class Weighted(NamedTuple):
+    """Templates picked with random.choices using the given weights"""
+    choices: List[str]
+    weights: List[float]
+
+
+# A replacement is a template string, a list of templates picked with
+# random.choice, weighted templates, or a callable receiving the match object
+Replacement = Union[str, Sequence[str], Weighted, Callable]
+
+
+class CompiledRule:
+    """A single rewrite rule compiled once at load time"""
+
+    def __init__(self, pattern: str, replacement: Replacement, flags: int = 0):
+        self.pattern = pattern
+        self.replacement = replacement
+        self.regex = re.compile(pattern, flags)
+        self.choices = None
+        self.weights = None
+
+        if isinstance(replacement, Weighted):
+            self.choices = [(choice, '\\' in choice) for choice in replacement.choices]
+            self.weights = list(replacement.weights)
+            self.repl = self._choose
+        elif isinstance(replacement, (list, tuple)):
+            # Remember which choices need group expansion so plain strings skip m.expand
+            self.choices = [(choice, '\\' in choice) for choice in replacement]
+            self.repl = self._choose
+        else:
+            self.repl = replacement
+
+        self.literal, self.has_boundary, self.bounds = _literal_info(pattern, flags)
+        self.required = _required_literals(pattern, flags)
+
+    def _pick(self, rng=random) -> Tuple[str, bool]:
+        if self.weights is not None:
+            return rng.choices(self.choices, self.weights)[0]
+        return rng.choice(self.choices)
+
+    def _choose(self, match: re.Match, rng=random) -> str:
+        choice, is_template = self._pick(rng)
+        return match.expand(choice) if is_template else choice
+
+    def apply(self, text: str, rng=random) -> Tuple[str, Sequence['CompiledRule']]:
+        """Returns the new text and (self,) when the rule fired.
+
+        `rng` is anything with the random module's choice/choices, e.g. a
+        per-request random.Random; the module-level generator by default.
+        """
+        # A failed search is cheaper than a failed subn, and most rules miss
+        if self.regex.search(text) is None:
+            return text, ()
+        repl = self.repl
+        if self.choices is not None and rng is not random:
+            repl = functools.partial(self._choose, rng=rng)
+        return self.regex.sub(repl, text), (self,)
+
+    def outputs(self) -> Optional[List[str]]:
+        """Every string this rule can produce, or None when that is unknown"""
+        if self.choices is not None:
+            if any(is_template for _, is_template in self.choices):
+                return None
+            return [choice for choice, _ in self.choices]
+        if isinstance(self.repl, str) and '\\' not in self.repl:
+            return [self.repl]
+        return None
+
+    def literal_replacement(self, rng=random) -> str:
+        if self.choices is not None:
+            return self._pick(rng)[0]
+        return self.repl
+
+
+class FusedRuleGroup:
+    """Several literal rules applied with one alternation scan.
+
+    Only rules that cannot overlap or feed each other are fused, so the
+    result is identical to applying them one after another. Replacements
+    are drawn in rule order (then position order), which keeps the random
+    draws, and therefore seeded output, unchanged.
+
+    With `changes_only`, a rule is reported only when one of its matches
+    was replaced by different text; matches left as they were are counted
+    in `unchanged`.
+    """
+
+    def __init__(self, rules: List[CompiledRule], flags: int = 0, changes_only: bool = False):
+        self.rules = rules
+        self.changes_only = changes_only
+        self.unchanged = Counter()
+        # No capture groups: the matched literal itself identifies the rule
+        self.regex = re.compile('|'.join(f'(?:{rule.pattern})' for rule in rules), flags)
+        self._fold = str.lower if flags & re.IGNORECASE else None
+        self._rule_index = {self._key(rule.literal): index for index, rule in enumerate(rules)}
+
+    def _key(self, matched: str) -> str:
+        return self._fold(matched) if self._fold else matched
+
+    def _index_of(self, matched: str) -> int:
+        index = self._rule_index.get(self._key(matched))
+        if index is None:  # Case-insensitive matches that str.lower does not map back
+            index = next(i for i, rule in enumerate(self.rules) if rule.regex.fullmatch(matched))
+        return index
+
+    def apply(self, text: str, rng=random) -> Tuple[str, Sequence[CompiledRule]]:
+        first = self.regex.search(text)
+        if first is None:
+            return text, ()
+
+        matches = [(self._index_of(m.group()), m.start(), m.end())
+                   for m in self.regex.finditer(text, first.start())]
+
+        replacements = {}
+        fired = set()
+        for index, start, end in sorted(matches):
+            replacement = self.rules[index].literal_replacement(rng)
+            replacements[start] = replacement
+            if not self.changes_only or replacement != text[start:end]:
+                fired.add(index)
+
+        pieces = []
+        position = 0
+        for _, start, end in matches:
+            pieces.append(text[position:start])
+            pieces.append(replacements[start])
+            position = end
+        pieces.append(text[position:])
+
+        if self.changes_only:
+            for index in {index for index, _, _ in matches} - fired:
+                self.unchanged[self.rules[index].pattern] += 1
+        return ''.join(pieces), [self.rules[index] for index in sorted(fired)]
+
+
+class LiteralPrefilter:
+    """Picks the passes that can match a text with one scan for the literals they require.
+
+    Each pass (a CompiledRule or FusedRuleGroup) is indexed under literals
+    that every one of its matches must contain; passes without such a
+    literal are always candidates. After a pass changes the text, the text
+    is scanned again for the passes that follow, so results are identical
+    to running every pass.
+    """
+
+    def __init__(self, passes: Sequence[Union[CompiledRule, FusedRuleGroup]], flags: int = 0):
+        self.passes = list(passes)
+        self._fold = str.lower if flags & re.IGNORECASE else None
+        self._always = set()
+        by_literal: Dict[str, set] = {}
+        for index, rule_pass in enumerate(self.passes):
+            literals = _pass_literals(rule_pass)
+            if not literals:
+                self._always.add(index)
+                continue
+            for literal in literals:
+                by_literal.setdefault(self._key(literal), set()).add(index)
+
+        # The scan reports the longest literal starting at each position, so a
+        # hit also stands for every literal contained in it
+        self._reach = {
+            literal: frozenset().union(*(indices for other, indices in by_literal.items() if other in literal))
+            for literal in by_literal
+        }
+        literals = sorted(by_literal, key=len, reverse=True)
+        self._scanner = re.compile('(?=(' + '|'.join(map(re.escape, literals)) + '))', flags) if literals else None
+
+    def _key(self, literal: str) -> str:
+        return self._fold(literal) if self._fold else literal
+
+    def candidates(self, text: str, after: int = -1) -> List[int]:
+        """Indices of the passes after `after` that could match text, in order"""
+        found = set(self._always)
+        if self._scanner is not None:
+            for literal in set(self._scanner.findall(text)):
+                reach = self._reach.get(self._key(literal))
+                if reach is None:  # A case-insensitive hit str.lower cannot map back
+                    return list(range(after + 1, len(self.passes)))
+                found |= reach
+        return sorted(index for index in found if index > after)
+
+    def apply_all(self, text: str, rng=random) -> Tuple[str, List[CompiledRule]]:
+        """Run every pass in order; returns the text and the rules that fired"""
+        fired_rules = []
+        candidates = self.candidates(text)
+        position = 0
+        while position < len(candidates):
+            index = candidates[position]
+            text, fired = self.passes[index].apply(text, rng)
+            if fired:
+                fired_rules.extend(fired)
+                # The new text may contain literals (or have lost some) for the passes that follow
+                candidates = self.candidates(text, index)
+                position = 0
+            else:
+                position += 1
+        return text, fired_rules
+
+    def apply_first(self, text: str, rng=random) -> Tuple[str, Sequence[CompiledRule]]:
+        """Run passes in order until one fires"""
+        for index in self.candidates(text):
+            text, fired = self.passes[index].apply(text, rng)
+            if fired:
+                return text, fired
+        return text, ()
+
+
+def load_pack(path: str = DEFAULT_RULES_PATH) -> Dict[str, List[Tuple[str, Replacement]]]:
+    """Read a JSON rule pack into (pattern, replacement) lists per section.
+
+    Every entry has a `pattern` and either a `replace` template (group
+    references like \\1 allowed) or a `choices` list. A choice is a template
+    string or {"text": ..., "weight": ...}; any weight makes the whole list
+    weighted. Entries may carry a free-form `note`. Raises ValueError with
+    the offending entry when the pack is invalid.
+    """
+    with open(path, encoding='utf-8') as f:
+        try:
+            raw = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{path}: invalid JSON: {e}") from e
+    return parse_pack(raw, path)
+
+
+def parse_pack(raw: Dict, source: str = '<pack>') -> Dict[str, List[Tuple[str, Replacement]]]:
+    pack = {}
+    for section in PACK_SECTIONS:
+        entries = raw.get(section)
+        if not isinstance(entries, list):
+            raise ValueError(f"{source}: '{section}' must be a list of rules")
+        pack[section] = [_parse_entry(entry, f"{source}: {section}[{index}]") for index, entry in enumerate(entries)]
+    return pack
+
+
+def _parse_entry(entry: Dict, where: str) -> Tuple[str, Replacement]:
+    if not isinstance(entry, dict) or not isinstance(entry.get('pattern'), str):
+        raise ValueError(f"{where}: a rule needs a 'pattern' string")
+    if ('replace' in entry) == ('choices' in entry):
+        raise ValueError(f"{where}: a rule needs exactly one of 'replace' or 'choices'")
+    try:
+        regex = re.compile(entry['pattern'])
+    except re.error as e:
+        raise ValueError(f"{where}: bad pattern: {e}") from e
+
+    if 'replace' in entry:
+        replacement = entry['replace']
+        templates = [replacement]
+    else:
+        choices = entry['choices']
+        if not isinstance(choices, list) or not choices:
+            raise ValueError(f"{where}: 'choices' must be a non-empty list")
+        if any(isinstance(choice, dict) for choice in choices):
+            choices = [choice if isinstance(choice, dict) else {'text': choice} for choice in choices]
+            replacement = Weighted([choice.get('text') for choice in choices],
+                                   [choice.get('weight', 1) for choice in choices])
+            templates = replacement.choices
+            weights = replacement.weights
+            if not all(isinstance(weight, (int, float)) and weight >= 0 for weight in weights) or not sum(weights):
+                raise ValueError(f"{where}: weights must be non-negative numbers, not all zero")
+        else:
+            replacement = templates = choices
+
+    for template in templates:
+        if not isinstance(template, str):
+            raise ValueError(f"{where}: replacements must be strings")
+        try:
+            sre_parse.parse_template(template, regex)
+        except re.error as e:
+            raise ValueError(f"{where}: bad replacement {template!r}: {e}") from e
+    return entry['pattern'], replacement
+
+
+def compile_rules(rules: Sequence[Tuple[str, Replacement]], flags: int = 0) -> List[CompiledRule]:
+    """Compile (pattern, replacement) pairs, keeping their order"""
+    return [CompiledRule(pattern, replacement, flags) for pattern, replacement in rules]
+
+
+def fuse_rules(rules: List[CompiledRule], flags: int = 0,
+               changes_only: bool = False) -> List[Union[CompiledRule, FusedRuleGroup]]:
+    """Merge runs of consecutive independent literal rules into alternation passes"""
+    passes = []
+    group = []
+
+    def flush():
+        if len(group) > 1:
+            passes.append(FusedRuleGroup(list(group), flags, changes_only))
+        else:
+            passes.extend(group)
+        group.clear()
+
+    for rule in rules:
+        if not _is_fusable(rule):
+            flush()
+            passes.append(rule)
+            continue
+        if any(_conflicts(earlier, rule, flags) for earlier in group):
+            flush()
+        group.append(rule)
+    flush()
+
+    return passes
+
+
+def _literal_info(pattern: str, flags: int) -> Tuple[Optional[str], bool, Tuple[bool, bool]]:
+    """Return (literal, has word-boundary assertion, (leading \\b, trailing \\b)) for plain literal patterns"""
+    try:
+        parsed = list(sre_parse.parse(pattern, flags))
+    except re.error:
+        return None, False, (False, False)
+
+    chars = []
+    has_boundary = False
+    for op, av in parsed:
+        if op is sre_constants.LITERAL:
+            chars.append(chr(av))
+        elif op is sre_constants.AT and av in (sre_constants.AT_BOUNDARY, sre_constants.AT_NON_BOUNDARY):
+            has_boundary = True
+        else:
+            return None, False, (False, False)
+
+    def is_boundary(item):
+        return item[0] is sre_constants.AT and item[1] is sre_constants.AT_BOUNDARY
+
+    bounds = (bool(parsed) and is_boundary(parsed[0]), bool(parsed) and is_boundary(parsed[-1]))
+    return (''.join(chars) or None), has_boundary, bounds
+
+
+def _required_literals(pattern: str, flags: int) -> Optional[frozenset]:
+    """Literals of which every match contains at least one, or None when there are none"""
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except re.error:
+        return None
+    if (parsed.state.flags ^ flags) & re.IGNORECASE:
+        return None  # Inline (?i) changes how literals match
+    return _required(list(parsed), bool(flags & re.IGNORECASE))
+
+
+def _required(items: list, ignorecase: bool) -> Optional[frozenset]:
+    best = None
+
+    def consider(options):
+        nonlocal best
+        if not options or (ignorecase and not all(option.isascii() for option in options)):
+            return
+        if best is None or min(map(len, options)) > min(map(len, best)):
+            best = frozenset(options)
+
+    run = []
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            run.append(chr(av))
+            continue
+        if run:
+            consider({''.join(run)})
+            run = []
+        if op is sre_constants.SUBPATTERN:
+            _, add_flags, del_flags, sub = av
+            if not add_flags and not del_flags:
+                consider(_required(list(sub), ignorecase))
+        elif op is sre_constants.BRANCH:
+            alternatives = [_required(list(alternative), ignorecase) for alternative in av[1]]
+            if all(alternatives):
+                consider(frozenset().union(*alternatives))
+        elif op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT):
+            low, _, sub = av
+            if low >= 1:
+                consider(_required(list(sub), ignorecase))
+        # Classes, anchors, lookarounds and the like do not require a particular literal
+    if run:
+        consider({''.join(run)})
+    return best
+
+
+def _pass_literals(rule_pass: Union[CompiledRule, FusedRuleGroup]) -> Optional[frozenset]:
+    if isinstance(rule_pass, CompiledRule):
+        return rule_pass.required
+    literals = [rule.required for rule in rule_pass.rules]
+    return frozenset().union(*literals) if all(literals) else None
+
+
+def _is_fusable(rule: CompiledRule) -> bool:
+    return rule.literal is not None and rule.regex.groups == 0 and rule.outputs() is not None
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+
+def _preserves_edges(rule: CompiledRule) -> bool:
+    """True when every output starts and ends with the same kind of char as the literal"""
+    literal = rule.literal
+    for output in rule.outputs():
+        if not output:
+            return False
+        if _is_word_char(output[0]) != _is_word_char(literal[0]):
+            return False
+        if _is_word_char(output[-1]) != _is_word_char(literal[-1]):
+            return False
+    return True
+
+
+def _fits(rule: CompiledRule, offset: int, chars: Dict[int, str], words: Dict[int, bool],
+          fold: Callable[[str], str]) -> bool:
+    """Could rule's literal match at `offset`, given some known chars and known word/non-word positions"""
+    literal = rule.literal
+    for i, char in enumerate(literal):
+        known = chars.get(offset + i)
+        if known is not None and fold(known) != fold(char):
+            return False
+        if offset + i in words and words[offset + i] != _is_word_char(char):
+            return False
+
+    def is_word_at(position: int) -> Optional[bool]:
+        if offset <= position < offset + len(literal):
+            return _is_word_char(literal[position - offset])
+        if position in chars:
+            return _is_word_char(chars[position])
+        return words.get(position)
+
+    # \b needs a word char on exactly one side; unknown neighbours could be anything
+    leading, trailing = rule.bounds
+    if leading and is_word_at(offset - 1) == _is_word_char(literal[0]):
+        return False
+    if trailing and is_word_at(offset + len(literal)) == _is_word_char(literal[-1]):
+        return False
+    return True
+
+
+def _can_overlap(a: CompiledRule, b: CompiledRule, fold: Callable[[str], str]) -> bool:
+    """Could matches of a and b share characters in some text"""
+    chars_a = dict(enumerate(a.literal))
+    for offset in range(1 - len(b.literal), len(a.literal)):
+        chars_b = {offset + i: char for i, char in enumerate(b.literal)}
+        if _fits(b, offset, chars_a, {}, fold) and _fits(a, 0, chars_b, {}, fold):
+            return True
+    return False
+
+
+def _can_create(earlier: CompiledRule, output: str, later: CompiledRule, fold: Callable[[str], str]) -> bool:
+    """Could replacing a match of `earlier` with output produce a match of `later` through it"""
+    if not output:
+        return True  # The neighbours are joined, which could form anything
+    chars = dict(enumerate(output))
+    # A \b around the replaced match tells us what kind of char sits next to the output
+    words = {}
+    if earlier.bounds[0]:
+        words[-1] = not _is_word_char(earlier.literal[0])
+    if earlier.bounds[1]:
+        words[len(output)] = not _is_word_char(earlier.literal[-1])
+    return any(_fits(later, offset, chars, words, fold)
+               for offset in range(1 - len(later.literal), len(output)))
+
+
+def _conflicts(earlier: CompiledRule, later: CompiledRule, flags: int = 0) -> bool:
+    """Would applying `earlier` first change what `later` matches"""
+    fold = str.lower if flags & re.IGNORECASE else str
+    if flags & re.IGNORECASE and not (earlier.literal + later.literal).isascii():
+        return True  # Unicode case folding is more than str.lower; stay conservative
+    if _can_overlap(earlier, later, fold):
+        return True
+    if any(_can_create(earlier, output, later, fold) for output in earlier.outputs()):
+        return True
+    if later.has_boundary and not _preserves_edges(earlier):
+        return True
+    return False
@@ -0,0 +1,226 @@
+import asyncio
+import copyreg
+import hashlib
+import io
+import json
+import os
+import pickle
+import re
+import stat
+import sys
+import tempfile
+import time
+from typing import Dict, NamedTuple, Optional
+
+import _sre
+
+from .grammar import GrammarFixer
+from .patterns import AdvancedPatterns
+from .rule_engine import DEFAULT_RULES_PATH, parse_pack, sre_parse
+
+try:
+    from re import _compiler as sre_compile
+except ImportError:  # Python < 3.11
+    import sre_compile
+
+# Bump when the compiled classes change shape, so stale snapshots are never loaded
+ENGINE_VERSION = 1
+
+# Snapshots hold interpreter-specific regex bytecode
+_SNAPSHOT_TAG = f'py{sys.version_info[0]}{sys.version_info[1]}-sre{_sre.MAGIC}-e{ENGINE_VERSION}'
+
+
+class RuleRef(NamedTuple):
+    """What a pool worker needs to load the same rules as the parent process"""
+    version: str
+    source: str
+    snapshot: Optional[str]
+
+
+class RuleSet:
+    """One compiled, immutable generation of rules"""
+
+    def __init__(self, version: str, source: str, patterns: AdvancedPatterns, grammar: GrammarFixer):
+        self.version = version
+        self.source = source
+        self.patterns = patterns
+        self.grammar = grammar
+        self.snapshot: Optional[str] = None
+
+    @property
+    def ref(self) -> RuleRef:
+        return RuleRef(self.version, self.source, self.snapshot)
+
+
+def load_ruleset(path: str, cache_dir: Optional[str] = None) -> RuleSet:
+    """Load a rule pack, from its compiled snapshot when one is cached"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    version = hashlib.sha256(data).hexdigest()[:12]
+
+    snapshot = os.path.join(cache_dir, f'rules-{version}-{_SNAPSHOT_TAG}.pickle') if cache_dir else None
+    if snapshot and os.path.exists(snapshot):
+        try:
+            rules = load_snapshot(snapshot)
+            rules.source = path
+            return rules
+        except Exception as e:
+            print(f"Ignoring unreadable rule snapshot {snapshot}: {e}")
+
+    try:
+        raw = json.loads(data)
+    except ValueError as e:
+        raise ValueError(f"{path}: invalid JSON: {e}") from e
+    pack = parse_pack(raw, path)
+    rules = RuleSet(version, path, AdvancedPatterns(pack), GrammarFixer(pack['typo_rules']))
+
+    if snapshot:
+        try:
+            write_snapshot(rules, snapshot)
+        except Exception as e:  # Snapshots are an optimisation; _reduce_pattern relies on sre internals
+            print(f"Could not write rule snapshot {snapshot}: {e}")
+    return rules
+
+
+def _check_private(path: str):
+    """Refuse a snapshot path that another user could have written: unpickling it runs code"""
+    info = os.stat(path)
+    if info.st_uid != os.getuid() or info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise PermissionError(f"{path} must be owned by this user and not writable by group or others")
+
+
+def load_snapshot(path: str) -> RuleSet:
+    _check_private(os.path.dirname(os.path.abspath(path)))
+    with open(path, 'rb') as f:
+        _check_private(path)
+        rules = pickle.load(f)
+    if not isinstance(rules, RuleSet):
+        raise ValueError("not a rule snapshot")
+    rules.snapshot = path
+    return rules
+
+
+def write_snapshot(rules: RuleSet, path: str):
+    """Pickle a compiled RuleSet, written to a temp file and renamed into place"""
+    buffer = io.BytesIO()
+    pickler = pickle.Pickler(buffer, pickle.HIGHEST_PROTOCOL)
+    # Store each regex's compiled bytecode instead of its source, so loading skips re.compile
+    pickler.dispatch_table = copyreg.dispatch_table.copy()
+    pickler.dispatch_table[re.Pattern] = _reduce_pattern
+    pickler.dump(rules)
+
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    _check_private(os.path.dirname(os.path.abspath(path)))  # exist_ok keeps whatever mode was there
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(buffer.getvalue())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    rules.snapshot = path
+
+
+def _reduce_pattern(pattern: re.Pattern):
+    # Mirrors re._compiler.compile; the snapshot tag pins the interpreter this is valid for
+    parsed = sre_parse.parse(pattern.pattern, pattern.flags)
+    code = [int(op) for op in sre_compile._code(parsed, pattern.flags)]  # Opcodes are named int constants
+    indexgroup = [None] * parsed.state.groups
+    for name, index in parsed.state.groupdict.items():
+        indexgroup[index] = name
+    return _sre.compile, (pattern.pattern, pattern.flags | parsed.state.flags, code,
+                          parsed.state.groups - 1, parsed.state.groupdict, tuple(indexgroup))
+
+
+class RuleManager:
+    """Owns the active RuleSet and swaps in recompiled ones.
+
+    Readers look up `current` when they need rules. A reload builds the new
+    rules off the event loop and replaces the reference in one assignment,
+    so nothing in flight is interrupted: work already holding the old
+    RuleSet finishes with it, and the next lookup gets the new one.
+    """
+
+    def __init__(self, path: Optional[str] = None, cache_dir: Optional[str] = None):
+        self.path = path or os.getenv('RULES_PATH', DEFAULT_RULES_PATH)
+        if cache_dir is None:
+            cache_dir = os.getenv('RULES_CACHE_DIR', '')
+        self.cache_dir = cache_dir or None  # Snapshots are opt-in; empty disables them
+
+        start = time.perf_counter()
+        self.current = load_ruleset(self.path, self.cache_dir)
+        self.load_ms = (time.perf_counter() - start) * 1000
+        self._log_noop_rules(self.current)
+        self.reloads = 0
+        self.last_error: Optional[str] = None
+        self._mtime = self._source_mtime()
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _source_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(self.path).st_mtime
+        except OSError:
+            return None
+
+    @staticmethod
+    def _log_noop_rules(rules: RuleSet):
+        # Logged here, once per load, rather than by every GrammarFixer a pool worker builds
+        for pattern in rules.grammar.noop_rules:
+            print(f"Grammar rule never changes text, skipping: {pattern}")
+
+    async def reload(self) -> Dict:
+        """Recompile the rule pack and swap it in; the old rules stay active if it is invalid"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            previous = self.current
+            self._mtime = self._source_mtime()
+            start = time.perf_counter()
+            try:
+                rules = await asyncio.to_thread(load_ruleset, self.path, self.cache_dir)
+            except (OSError, ValueError) as e:
+                self.last_error = str(e)
+                raise
+            self.load_ms = (time.perf_counter() - start) * 1000
+            self.last_error = None
+            changed = rules.version != previous.version
+            if changed:
+                self.current = rules
+                self.reloads += 1
+                print(f"Rules reloaded: {previous.version} -> {rules.version}")
+                self._log_noop_rules(rules)
+            return {'version': self.current.version, 'previous_version': previous.version,
+                    'changed': changed, 'load_ms': self.load_ms}
+
+    async def watch(self, interval: float):
+        """Reload whenever the rule pack file changes"""
+        while True:
+            await asyncio.sleep(interval)
+            if self._source_mtime() == self._mtime:
+                continue
+            try:
+                await self.reload()
+            except (OSError, ValueError) as e:
+                print(f"Rule reload failed, keeping {self.current.version}: {e}")
+
+    def stats(self) -> Dict:
+        return {
+            'version': self.current.version,
+            'source': self.path,
+            'snapshot': self.current.snapshot,
+            'load_ms': self.load_ms,
+            'reloads': self.reloads,
+            'last_error': self.last_error,
+            'grammar': self.current.grammar.stats(),
+        }
+
+
+if __name__ == "__main__":
+    # Build step: `python -m app.rulepack` compiles the rule pack into RULES_CACHE_DIR so cold starts load the snapshot.
+    # Go through the package: classes defined in __main__ would be pickled as __main__.RuleSet, which the app cannot load.
+    from app.rulepack import RuleManager as PackageRuleManager
+    manager = PackageRuleManager()
+    if manager.current.snapshot is None:
+        sys.exit("RULES_CACHE_DIR is empty, snapshots are disabled")
+    print(f"Rules {manager.current.version} snapshot: {manager.current.snapshot} ({manager.load_ms:.1f}ms)")
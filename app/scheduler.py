@@ -0,0 +1,170 @@
+import asyncio
+import os
+import random
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Type
+
+from . import metrics
+
+
+def retryable_errors() -> Tuple[Type[BaseException], ...]:
+    """Errors worth retrying: rate limits, transient server failures, dropped connections"""
+    import openai  # Only once a retry decision is needed, so FAST-only processes never load it
+    return (openai.RateLimitError, openai.InternalServerError, openai.APIConnectionError)
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at `per_minute` tokens per minute"""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        # Default burst is six seconds' worth, so a cold start cannot spend a whole minute at once
+        self.capacity = capacity or max(1.0, per_minute / 10.0)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    async def acquire(self, amount: float = 1.0):
+        """Take `amount` tokens, waiting until they have been refilled.
+
+        A request larger than the capacity waits for a full bucket and then
+        leaves it in debt, so later requests wait until the whole amount has
+        been paid back and the per-minute rate holds for any request size.
+        """
+        if not self.enabled:
+            return
+        needed = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= needed:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((needed - self.tokens) / self.rate)
+
+    def has_room(self, amount: float) -> bool:
+        """Could acquire(amount) succeed right now without waiting"""
+        if not self.enabled:
+            return True
+        if self._lock.locked():  # Someone is already waiting for a refill
+            return False
+        self._refill()
+        return self.tokens >= min(amount, self.capacity)
+
+    def take(self, amount: float):
+        """Charge `amount` without waiting; only after has_room() said yes"""
+        if self.enabled:
+            self.tokens -= amount
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits for the OpenAI API"""
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        if requests_per_minute is None:
+            requests_per_minute = float(os.getenv('OPENAI_RPM', '0'))
+        if tokens_per_minute is None:
+            tokens_per_minute = float(os.getenv('OPENAI_TPM', '0'))
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.throttled = 0
+
+    async def acquire(self, tokens: int):
+        start = time.monotonic()
+        await self.requests.acquire(1)
+        await self.tokens.acquire(tokens)
+        waited = time.monotonic() - start
+        metrics.observe_stage('rate_limit_wait', waited)
+        if waited > 0.001:
+            self.throttled += 1
+
+    def try_acquire(self, tokens: int) -> bool:
+        """Charge one request of `tokens` if both limits have room now, without waiting"""
+        if not (self.requests.has_room(1) and self.tokens.has_room(tokens)):
+            return False
+        self.requests.take(1)
+        self.tokens.take(tokens)
+        return True
+
+    def stats(self) -> Dict:
+        return {
+            'requests_per_minute': self.requests.rate * 60,
+            'tokens_per_minute': self.tokens.rate * 60,
+            'throttled': self.throttled,
+        }
+
+
+def retry_delay(error: BaseException, attempt: int, base: float = 0.5, cap: float = 8.0) -> float:
+    """Full-jitter exponential backoff, never shorter than a Retry-After header"""
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    response = getattr(error, 'response', None)
+    retry_after = response.headers.get('retry-after') if response is not None else None
+    try:
+        return max(delay, float(retry_after)) if retry_after else delay
+    except ValueError:
+        return delay
+
+
+async def call_with_retries(factory: Callable[[], Awaitable[Any]], limiter: RateLimiter, tokens: int,
+                            retries: int, on_retry: Optional[Callable[[BaseException], None]] = None) -> Any:
+    """Run factory() under the rate limiter, retrying retryable errors with jittered backoff"""
+    for attempt in range(retries + 1):
+        await limiter.acquire(tokens)
+        try:
+            return await factory()
+        except retryable_errors() as e:
+            if attempt == retries:
+                raise
+            if on_retry is not None:
+                on_retry(e)
+            await asyncio.sleep(retry_delay(e, attempt))
+
+
+class BatchScheduler:
+    """Runs batch items under one process-wide concurrency limit.
+
+    Results are yielded as (index, result) in completion order, so callers
+    can stream them or put them back in input order.
+    """
+
+    def __init__(self, concurrency: Optional[int] = None):
+        self.concurrency = concurrency or int(os.getenv('BATCH_CONCURRENCY', '8'))
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self.active = 0
+        self.queued = 0
+
+    async def run(self, items: List[Any], worker: Callable[[Any], Awaitable[Any]]) -> AsyncIterator[Tuple[int, Any]]:
+        async def guarded(index: int, item: Any) -> Tuple[int, Any]:
+            self.queued += 1
+            queued_at = time.monotonic()
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self.queued -= 1
+            metrics.observe_stage('queue_wait', time.monotonic() - queued_at)
+            self.active += 1
+            try:
+                return index, await worker(item)
+            finally:
+                self.active -= 1
+                self._semaphore.release()
+
+        tasks = [asyncio.create_task(guarded(index, item)) for index, item in enumerate(items)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stats(self) -> Dict:
+        return {'concurrency': self.concurrency, 'active': self.active, 'queued': self.queued}
@@ -0,0 +1,44 @@
+import time
+from typing import Dict, Optional
+
+
+class StartupTimer:
+    """How long each startup phase took, counted from the first import of the app package.
+
+    Phases are marked in order and each runs from the previous mark. Work
+    put off until first use (the OpenAI client) is recorded separately,
+    since its cost lands on a request rather than on startup.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.phases: Dict[str, float] = {}
+        self.deferred: Dict[str, float] = {}
+        self.ready: Optional[float] = None
+
+    def mark(self, phase: str) -> float:
+        now = time.perf_counter()
+        self.phases[phase] = now - self._last
+        self._last = now
+        return self.phases[phase]
+
+    def finish(self, phase: str) -> float:
+        """Mark the last phase; the app is ready to serve from here"""
+        self.mark(phase)
+        self.ready = self._last - self.started
+        return self.ready
+
+    def record_deferred(self, name: str, seconds: float):
+        self.deferred[name] = seconds
+
+    def report(self) -> Dict:
+        return {
+            'phases_ms': {phase: round(seconds * 1000, 1) for phase, seconds in self.phases.items()},
+            'ready_ms': round(self.ready * 1000, 1) if self.ready is not None else None,
+            'deferred_ms': {name: round(seconds * 1000, 1) for name, seconds in self.deferred.items()},
+        }
+
+
+# Created when app/__init__.py runs, before any other app module is imported
+timer = StartupTimer()
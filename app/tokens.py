@@ -0,0 +1,95 @@
+import re
+from typing import List, Tuple
+
+try:
+    import tiktoken
+except ImportError:  # Fall back to the word-based estimate below
+    tiktoken = None
+
+# Words, numbers and single punctuation marks: roughly the pieces a BPE tokenizer keeps whole
+_PIECES = re.compile(r'\w+|[^\w\s]')
+_PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+_SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+')
+
+_encoding = None
+
+
+def estimate_tokens(text: str) -> int:
+    """Tokens in `text`: exact with tiktoken installed, otherwise estimated from its words.
+
+    Common English words are one token each and punctuation marks one
+    more; long words are split into a token per 8 characters or so.
+    """
+    global _encoding
+    if tiktoken is not None:
+        if _encoding is None:
+            _encoding = tiktoken.get_encoding('cl100k_base')
+        return len(_encoding.encode(text))
+    return sum(1 + (len(piece) - 1) // 8 for piece in _PIECES.findall(text))
+
+
+def completion_tokens(text: str, aggressive: bool = False) -> int:
+    """max_tokens for a rewrite of `text`, with room for the clauses each prompt asks the model to add.
+
+    AGGRESSIVE rewrites add two or three "which" clauses, so short texts can
+    more than double; BALANCED ones add a clause and a connective. A reply
+    cut off at this limit is discarded, so the floors err on the generous side.
+    """
+    tokens = estimate_tokens(text)
+    if aggressive:
+        return max(64, int(tokens * 2.5))
+    return int(tokens * 1.5) + 48
+
+
+def split_chunks(text: str, max_tokens: int) -> List[Tuple[str, str]]:
+    """Split text into (chunk, separator) pairs of at most about `max_tokens` each.
+
+    Chunks end at paragraph breaks where possible; a paragraph over the
+    budget is split between sentences. Joining each chunk with the
+    separator after it gives back the original text.
+    """
+    pieces = []  # (paragraph or sentence, whitespace after it)
+    position = 0
+    for match in _PARAGRAPH_BREAK.finditer(text):
+        pieces.extend(_split_paragraph(text[position:match.start()], match.group(), max_tokens))
+        position = match.end()
+    pieces.extend(_split_paragraph(text[position:], '', max_tokens))
+
+    chunks = []
+    parts: List[str] = []
+    parts_tokens = 0
+    last_separator = ''
+    for piece, separator in pieces:
+        tokens = estimate_tokens(piece)
+        if parts and parts_tokens + tokens > max_tokens:
+            chunks.append((''.join(parts), last_separator))
+            parts, parts_tokens = [], 0
+        elif parts:
+            parts.append(last_separator)
+        parts.append(piece)
+        parts_tokens += tokens
+        last_separator = separator
+    if parts:
+        chunks.append((''.join(parts), last_separator))
+    return chunks
+
+
+def _split_paragraph(paragraph: str, separator: str, max_tokens: int) -> List[Tuple[str, str]]:
+    if estimate_tokens(paragraph) <= max_tokens:
+        return [(paragraph, separator)]
+    pieces = []
+    position = 0
+    for match in _SENTENCE_BREAK.finditer(paragraph):
+        pieces.append((paragraph[position:match.start()], match.group()))
+        position = match.end()
+    pieces.append((paragraph[position:], separator))
+    return pieces
+
+
+def tail_context(text: str, max_chars: int = 300) -> str:
+    """The last whole sentences of `text` that fit in `max_chars`, to show a model what came before"""
+    sentences = _SENTENCE_BREAK.split(text.strip())
+    tail = sentences.pop()
+    while sentences and len(sentences[-1]) + 1 + len(tail) <= max_chars:
+        tail = sentences.pop() + ' ' + tail
+    return tail[-max_chars:]
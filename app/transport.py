@@ -0,0 +1,110 @@
+import os
+import time
+from collections import deque
+from typing import Dict, Optional
+
+import httpx
+
+try:
+    import h2  # noqa: F401  httpx needs it for HTTP/2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class PooledTransport(httpx.AsyncHTTPTransport):
+    """httpx transport with explicit pool limits that tracks how busy the pool is"""
+
+    def __init__(self, max_connections: int, max_keepalive: int, keepalive_expiry: float, http2: bool):
+        super().__init__(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive,
+                                keepalive_expiry=keepalive_expiry),
+            http2=http2,
+        )
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.http2 = http2
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.at_pool_limit = 0  # Requests that started with every connection already busy
+
+    @classmethod
+    def from_env(cls) -> 'PooledTransport':
+        # Each batch unit can have a few completions in flight, so leave room above BATCH_CONCURRENCY
+        default_connections = 4 * int(os.getenv('BATCH_CONCURRENCY', '8'))
+        max_connections = int(os.getenv('OPENAI_MAX_CONNECTIONS', str(default_connections)))
+        http2 = os.getenv('OPENAI_HTTP2', '1') == '1'
+        if http2 and not HTTP2_AVAILABLE:
+            print("OPENAI_HTTP2 is on but the h2 package is missing, using HTTP/1.1")
+            http2 = False
+        return cls(
+            max_connections=max_connections,
+            max_keepalive=int(os.getenv('OPENAI_MAX_KEEPALIVE', str(max_connections))),
+            keepalive_expiry=float(os.getenv('OPENAI_KEEPALIVE_EXPIRY', '30')),
+            http2=http2,
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        if self.in_flight >= self.max_connections:
+            self.at_pool_limit += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            return await super().handle_async_request(request)
+        finally:
+            self.in_flight -= 1
+
+    def stats(self) -> Dict:
+        connections = self._pool.connections
+        idle = sum(connection.is_idle() for connection in connections)
+        return {
+            'http2': self.http2,
+            'max_connections': self.max_connections,
+            'max_keepalive': self.max_keepalive,
+            'connections': len(connections),
+            'idle_connections': idle,
+            'requests': self.requests,
+            'in_flight': self.in_flight,
+            'peak_in_flight': self.peak_in_flight,
+            'at_pool_limit': self.at_pool_limit,
+            'saturation': self.in_flight / self.max_connections,
+        }
+
+
+def request_timeout(read: float) -> httpx.Timeout:
+    """Per-request timeout: the caller's budget for reading, but a short fuse for connecting"""
+    connect = float(os.getenv('OPENAI_CONNECT_TIMEOUT', '2.0'))
+    return httpx.Timeout(read, connect=min(connect, read), pool=read)
+
+
+class CallHealth:
+    """Outcomes of recent OpenAI calls, so health checks need not make calls of their own"""
+
+    def __init__(self, window: Optional[int] = None):
+        window = window or int(os.getenv('OPENAI_HEALTH_WINDOW', '20'))
+        self._outcomes = deque(maxlen=window)  # (finished_at, reached_api, error)
+        self.last_success: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def record(self, error: Optional[BaseException] = None):
+        # An HTTP error status still means the API was reachable
+        reached = error is None or hasattr(error, 'status_code')
+        self._outcomes.append((time.time(), reached, None if error is None else str(error)))
+        if error is None:
+            self.last_success = time.time()
+        else:
+            self.last_error = str(error)
+
+    def report(self) -> Dict:
+        outcomes = list(self._outcomes)
+        failures = sum(error is not None for _, _, error in outcomes)
+        return {
+            'connected': outcomes[-1][1] if outcomes else None,  # None until the first call
+            'recent_calls': len(outcomes),
+            'recent_failures': failures,
+            'error_rate': failures / len(outcomes) if outcomes else 0.0,
+            'seconds_since_success': time.time() - self.last_success if self.last_success else None,
+            'last_error': self.last_error,
+        }
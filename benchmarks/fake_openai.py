@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Offline stand-in for the OpenAI chat completions API, for benchmarks.
+
+Answers like app.backends.StubBackend ("Rewritten: <original>", packed
+prompts as {"rewrites": [...]}) after a configurable delay, and fails a
+configurable share of requests. Point the app at it with
+OPENAI_BASE_URL=http://127.0.0.1:<port>/v1.
+
+Usage: python benchmarks/fake_openai.py [--port 8081] [--latency-ms 50] [--jitter-ms 10]
+                                        [--slow-rate 0.0] [--slow-ms 2000]
+                                        [--error-rate 0.0] [--error-status 500] [--seed 0]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.backends import StubBackend
+
+
+def create_app(latency_ms: float = 50.0, jitter_ms: float = 0.0, slow_rate: float = 0.0,
+               slow_ms: float = 2000.0, error_rate: float = 0.0, error_status: int = 500,
+               seed: int = 0) -> FastAPI:
+    app = FastAPI(title="Fake OpenAI")
+    rng = random.Random(seed)
+    stub = StubBackend('fake-openai')
+    counters = {'requests': 0, 'errors': 0, 'slow': 0}
+
+    def delay() -> float:
+        if slow_rate and rng.random() < slow_rate:
+            counters['slow'] += 1
+            return slow_ms / 1000
+        return max(0.0, latency_ms + rng.uniform(-jitter_ms, jitter_ms)) / 1000
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "fake-model", "object": "model", "owned_by": "benchmarks"}]}
+
+    @app.get("/stats")
+    async def stats():
+        return counters
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        counters['requests'] += 1
+        # Draw both up front so the failure pattern depends only on the request count
+        failed = rng.random() < error_rate
+        await asyncio.sleep(delay())
+        if failed:
+            counters['errors'] += 1
+            return JSONResponse(
+                status_code=error_status,
+                content={"error": {"message": "Injected failure", "type": "server_error", "code": None}},
+            )
+
+        completion = await stub.complete(body['messages'], body.get('max_tokens', 0), body.get('temperature', 1.0), 0)
+        content = completion.choices[0].message.content
+        model = body.get('model', 'fake-model')
+        prompt_tokens = sum(len(message['content']) for message in body['messages']) // 4
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        if body.get('stream'):
+            return StreamingResponse(_stream(completion_id, model, content), media_type="text/event-stream")
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(content) // 4,
+                "total_tokens": prompt_tokens + len(content) // 4,
+            },
+        }
+
+    return app
+
+
+async def _stream(completion_id: str, model: str, content: str):
+    words = content.split(' ')
+    for index, word in enumerate(words):
+        delta = word + (' ' if index < len(words) - 1 else '')
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": {"content": delta}, "finish_reason": None}],
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency-ms', type=float, default=50.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--slow-rate', type=float, default=0.0, help="Share of requests that take --slow-ms")
+    parser.add_argument('--slow-ms', type=float, default=2000.0)
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of requests answered with --error-status")
+    parser.add_argument('--error-status', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    app = create_app(args.latency_ms, args.jitter_ms, args.slow_rate, args.slow_ms,
+                     args.error_rate, args.error_status, args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level='warning')
+
+
+if __name__ == "__main__":
+    main()
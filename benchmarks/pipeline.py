@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Benchmark the humanization pipeline end to end against an offline OpenAI stub.
+
+Covers AdvancedPatterns.apply_patterns, _fix_grammar_and_typos,
+HybridHumanizer.humanize in every ProcessingMode and POST /batch, over a
+corpus from one sentence up to the 10,000-character request limit. OpenAI
+calls go to benchmarks/fake_openai.py, started in a subprocess with the given
+latency and error injection. Caches are disabled so every run does the work.
+
+Prints throughput and p50/p95/p99 latencies as JSON. With --baseline, also
+compares p95s against an earlier run and exits 1 if any regressed by more
+than --max-regression.
+
+Usage: python benchmarks/pipeline.py [--quick] [--output results.json] [--baseline old.json]
+                                     [--latency-ms 50] [--jitter-ms 10] [--error-rate 0.0]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import Counter
+from typing import Dict, List
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+SENTENCES = [
+    "Furthermore, it is important to note that artificial intelligence utilizes vast amounts of data.",
+    "Climate change impacts are becoming more evident in our world, affecting ecosystems and human health.",
+    "Additionally, individuals demonstrate new skills when they utilize modern tools.",
+    "However, research suggests that people adapt to change faster than expected.",
+    "Technology provides many benefits to society, and it enables teams to collaborate across borders.",
+    "Moreover, the effectiveness of this approach is evident in several recent studies.",
+    "It is crucial to implement robust safeguards before deploying these systems.",
+    "Developers can build applications quickly, which facilitates rapid experimentation.",
+    "In conclusion, the results demonstrate a significant improvement over the baseline.",
+    "Consequently, organizations must carefully consider the long-term implications of automation.",
+]
+
+# Characters per corpus entry; 10000 is HumanizeRequest's max_length
+SIZES = {'sentence': 0, '500': 500, '2k': 2000, '5k': 5000, '10k': 10000}
+
+
+def build_corpus(seed: int) -> Dict[str, str]:
+    """One text per size, built from whole sentences in a seeded order"""
+    rng = random.Random(seed)
+    corpus = {}
+    for name, size in SIZES.items():
+        if not size:
+            corpus[name] = SENTENCES[0]
+            continue
+        sentences: List[str] = []
+        length = -1
+        while True:
+            sentence = rng.choice(SENTENCES)
+            if length + 1 + len(sentence) > size:
+                break
+            sentences.append(sentence)
+            length += 1 + len(sentence)
+        corpus[name] = ' '.join(sentences)
+    return corpus
+
+
+def summarize(samples: List[float], wall: float, chars: int) -> Dict:
+    """Latency percentiles in ms plus throughput over the wall-clock time"""
+    ordered = sorted(samples)
+
+    def percentile(percent: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))] * 1000, 3)
+
+    return {
+        'count': len(samples),
+        'mean_ms': round(sum(samples) / len(samples) * 1000, 3),
+        'p50_ms': percentile(50),
+        'p95_ms': percentile(95),
+        'p99_ms': percentile(99),
+        'throughput_per_s': round(len(samples) / wall, 2),
+        'chars_per_s': round(chars / wall, 1),
+    }
+
+
+def bench_sync(func, text: str, iterations: int) -> Dict:
+    func(text, 0)  # warm-up
+    samples = []
+    start = time.perf_counter()
+    for i in range(iterations):
+        began = time.perf_counter()
+        func(text, i)
+        samples.append(time.perf_counter() - began)
+    return summarize(samples, time.perf_counter() - start, len(text) * iterations)
+
+
+async def bench_async(func, text: str, iterations: int, concurrency: int) -> Dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = []
+    methods = Counter()
+
+    async def one(i: int):
+        async with semaphore:
+            began = time.perf_counter()
+            result = await func(text, i)
+            samples.append(time.perf_counter() - began)
+            methods.update(result)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(iterations)))
+    summary = summarize(samples, time.perf_counter() - start, len(text) * iterations)
+    summary['methods'] = dict(methods)
+    return summary
+
+
+async def run_benchmarks(args, corpus: Dict[str, str]) -> Dict:
+    from httpx import AsyncClient
+
+    from app import main
+    from app.models import ProcessingMode
+
+    results = {'patterns': {}, 'grammar': {}, 'humanize': {}, 'batch': {}}
+    async with main.lifespan(main.app):
+        humanizer = main.humanizer
+        patterns = humanizer.patterns
+
+        for name, text in corpus.items():
+            results['patterns'][name] = bench_sync(
+                lambda text, i: patterns.apply_patterns(text, rng=random.Random(args.seed + i)),
+                text, args.iterations)
+            results['grammar'][name] = bench_sync(
+                lambda text, i: humanizer._fix_grammar_and_typos(text), text, args.iterations)
+
+        for mode in ProcessingMode:
+            iterations = args.iterations if mode == ProcessingMode.FAST else args.openai_iterations
+            results['humanize'][mode.value] = {}
+            for name, text in corpus.items():
+                async def humanize(text: str, i: int, mode=mode):
+                    result = await humanizer.humanize(text, mode, seed=args.seed + i)
+                    return [result['method_used']]
+                results['humanize'][mode.value][name] = await bench_async(
+                    humanize, text, iterations, args.concurrency)
+
+        # A mixed batch cycling through every corpus size
+        texts = [list(corpus.values())[i % len(corpus)] for i in range(args.batch_size)]
+        async with AsyncClient(app=main.app, base_url="http://test", timeout=None) as client:
+            for mode in ProcessingMode:
+                async def batch(text: str, i: int, mode=mode):
+                    response = await client.post("/batch", json={"texts": texts, "mode": mode.value, "seed": args.seed + i})
+                    response.raise_for_status()
+                    return [result['method_used'] for result in response.json()['results']]
+                summary = await bench_async(batch, '', args.batch_rounds, 1)
+                summary['chars_per_s'] = round(summary['throughput_per_s'] * sum(map(len, texts)), 1)
+                summary['texts_per_s'] = round(summary['throughput_per_s'] * len(texts), 2)
+                results['batch'][mode.value] = summary
+
+        results['openai'] = {
+            'hedging': humanizer.openai.hedger.stats(),
+            'circuit': humanizer.openai.breaker.stats(),
+        }
+    return results
+
+
+def compare(results: Dict, baseline: Dict, max_regression: float) -> List[Dict]:
+    """p95s that got worse than the baseline by more than max_regression"""
+    regressions = []
+
+    def walk(current, previous, path):
+        if not isinstance(current, dict) or not isinstance(previous, dict):
+            return
+        if 'p95_ms' in current and 'p95_ms' in previous:
+            if previous['p95_ms'] and current['p95_ms'] > previous['p95_ms'] * (1 + max_regression):
+                regressions.append({
+                    'benchmark': '.'.join(path),
+                    'baseline_p95_ms': previous['p95_ms'],
+                    'p95_ms': current['p95_ms'],
+                    'ratio': round(current['p95_ms'] / previous['p95_ms'], 2),
+                })
+            return
+        for key, value in current.items():
+            walk(value, previous.get(key), path + [key])
+
+    walk(results['results'], baseline.get('results', {}), [])
+    return regressions
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.contextmanager
+def fake_openai(args):
+    """Run benchmarks/fake_openai.py in its own process so it does not share the GIL with the app"""
+    port = free_port()
+    command = [
+        sys.executable, os.path.join(ROOT, 'benchmarks', 'fake_openai.py'), '--port', str(port),
+        '--latency-ms', str(args.latency_ms), '--jitter-ms', str(args.jitter_ms),
+        '--slow-rate', str(args.slow_rate), '--slow-ms', str(args.slow_ms),
+        '--error-rate', str(args.error_rate), '--error-status', str(args.error_status),
+        '--seed', str(args.seed),
+    ]
+    process = subprocess.Popen(command)
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            try:
+                urllib.request.urlopen(f"{base_url}/v1/models", timeout=1)
+                break
+            except OSError:
+                if process.poll() is not None:
+                    raise RuntimeError("Fake OpenAI server exited on startup")
+                time.sleep(0.1)
+        else:
+            raise RuntimeError("Fake OpenAI server did not start")
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--iterations', type=int, default=200, help="Runs per size for regex-only benchmarks")
+    parser.add_argument('--openai-iterations', type=int, default=40, help="Runs per size for BALANCED/AGGRESSIVE")
+    parser.add_argument('--concurrency', type=int, default=8, help="Concurrent humanize() calls")
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--batch-rounds', type=int, default=5)
+    parser.add_argument('--quick', action='store_true', help="A fraction of the iterations, for smoke runs")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency-ms', type=float, default=50.0)
+    parser.add_argument('--jitter-ms', type=float, default=10.0)
+    parser.add_argument('--slow-rate', type=float, default=0.0)
+    parser.add_argument('--slow-ms', type=float, default=2000.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=500)
+    parser.add_argument('--output', help="Also write the JSON results to this file")
+    parser.add_argument('--baseline', help="Earlier results to compare p95s against")
+    parser.add_argument('--max-regression', type=float, default=0.2)
+    args = parser.parse_args()
+    if args.quick:
+        args.iterations, args.openai_iterations = 20, 8
+        args.batch_size, args.batch_rounds = 10, 2
+
+    corpus = build_corpus(args.seed)
+    random.seed(args.seed)
+    with fake_openai(args) as base_url:
+        os.environ.update({
+            'OPENAI_API_KEY': 'benchmark',
+            'OPENAI_BASE_URL': f"{base_url}/v1",
+            'LLM_BACKEND': 'openai',
+            'OPENAI_CACHE_MAX_BYTES': '0',
+            'FAST_CACHE_MAX_BYTES': '0',
+            'REDIS_URL': '',
+        })
+        os.environ.pop('HEDGE_BACKEND', None)
+        # The app logs with print(); keep stdout for the JSON
+        with contextlib.redirect_stdout(sys.stderr):
+            start = time.perf_counter()
+            results = asyncio.run(run_benchmarks(args, corpus))
+            elapsed = time.perf_counter() - start
+
+    from app import main as app_main
+
+    report = {
+        'version': app_main.app.version,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'config': vars(args),
+        'corpus_chars': {name: len(text) for name, text in corpus.items()},
+        'seconds': round(elapsed, 1),
+        'results': results,
+    }
+    regressions = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.max_regression)
+        report['regressions'] = regressions
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
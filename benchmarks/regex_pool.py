@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Measure FAST-mode regex throughput for the thread and process-pool executors.
+
+Usage: python benchmarks/regex_pool.py [--texts 400] [--chars 4000] [--max-workers N]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.executor import RegexExecutor
+from app.patterns import AdvancedPatterns
+
+SAMPLE = (
+    "Climate change impacts are becoming more evident in our world, affecting ecosystems, "
+    "weather patterns, and human health. Additionally, individuals utilize new tools and "
+    "demonstrate skills. However, research suggests that people adapt. Technology provides "
+    "many benefits to society. Developers can build apps quickly. It is crucial to rest. "
+)
+
+
+async def run(executor: RegexExecutor, texts):
+    start = time.perf_counter()
+    await executor.apply_many(texts)
+    return time.perf_counter() - start
+
+
+def measure(backend: str, workers: int, texts, rounds: int) -> dict:
+    executor = RegexExecutor(AdvancedPatterns(), backend=backend, workers=workers, inline_threshold=0)
+    executor.start()
+    try:
+        asyncio.run(run(executor, texts[:workers]))  # warm-up
+        elapsed = min(asyncio.run(run(executor, texts)) for _ in range(rounds))
+    finally:
+        executor.shutdown()
+    return {
+        'backend': backend,
+        'workers': workers,
+        'seconds': round(elapsed, 4),
+        'texts_per_second': round(len(texts) / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--texts', type=int, default=400)
+    parser.add_argument('--chars', type=int, default=4000)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    text = (SAMPLE * (args.chars // len(SAMPLE) + 1))[:args.chars]
+    texts = [text] * args.texts
+
+    results = [measure('thread', 1, texts, args.rounds)]
+    for workers in range(1, args.max_workers + 1):
+        results.append(measure('process', workers, texts, args.rounds))
+
+    baseline = results[0]['texts_per_second']
+    for result in results:
+        result['speedup'] = round(result['texts_per_second'] / baseline, 2)
+
+    print(json.dumps({'cpu_count': os.cpu_count(), 'text_chars': args.chars, 'results': results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
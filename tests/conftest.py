@@ -0,0 +1,67 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+
+class FakeCompletions:
+    """Stands in for client.chat.completions, echoing the prompt's original text"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = []
+        self.malformed_packs = False
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        prompt = kwargs['messages'][-1]['content']
+        if 'Texts (JSON array):' in prompt:
+            texts = json.loads(prompt.split('Texts (JSON array):', 1)[1])
+            rewrites = [f"Rewritten: {text}" for text in texts]
+            content = "not json" if self.malformed_packs else json.dumps({"rewrites": rewrites})
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+        original = prompt.split('Original: ', 1)[-1].split('\n', 1)[0]
+        content = f"Rewritten: {original}"
+        if kwargs.get('stream'):
+            return self._stream(content)
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    async def _stream(self, content):
+        for word in content.split(' '):
+            delta = SimpleNamespace(content=word + ' ')
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+@pytest.fixture
+def fake_completions():
+    return FakeCompletions()
+
+
+@pytest.fixture
+def openai_key(monkeypatch):
+    # The OpenAI client refuses to build without a key; tests never reach the network.
+    # Only set where needed, so FAST paths are exercised without one.
+    monkeypatch.setenv('OPENAI_API_KEY', 'test-key')
+
+
+@pytest.fixture
+def openai_humanizer(fake_completions, openai_key):
+    from app.openai_client import OpenAIHumanizer
+
+    humanizer = OpenAIHumanizer()
+    humanizer.client = SimpleNamespace(chat=SimpleNamespace(completions=fake_completions))
+    return humanizer
+
+
+@pytest.fixture
+def humanizer(openai_humanizer):
+    """A HybridHumanizer whose OpenAI calls go to fake_completions"""
+    from app.humanizer import HybridHumanizer
+
+    humanizer = HybridHumanizer()
+    humanizer.openai = openai_humanizer
+    return humanizer
@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+from app.backends import Hedger, StubBackend
+from app.scheduler import RateLimiter
+
+
+class SlowBackend(StubBackend):
+    def __init__(self, delay):
+        super().__init__('slow', delay)
+        self.cancelled = 0
+
+    async def complete(self, *args, **kwargs):
+        try:
+            return await super().complete(*args, **kwargs)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+
+MESSAGES = [{"role": "user", "content": "Original: Research suggests new findings.\nRewrite."}]
+
+
+def _request(backend, budget):
+    return backend.complete(MESSAGES, 100, 0.9, budget)
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged_and_cancelled():
+    primary, alternate = SlowBackend(1.0), StubBackend('fast', 0.01)
+    hedger = Hedger(primary, alternate, initial_delay=0.05)
+
+    backend, response = await hedger.call(_request, timeout=5.0)
+    await asyncio.sleep(0)
+
+    assert backend is alternate
+    assert response.choices[0].message.content == "Rewritten: Research suggests new findings."
+    assert primary.cancelled == 1
+    assert hedger.stats()['hedge_wins'] == 1
+
+
+@pytest.mark.asyncio
+async def test_hedge_threshold_follows_recent_latency():
+    primary, alternate = StubBackend('primary', 0.01), StubBackend('alternate')
+    hedger = Hedger(primary, alternate, percentile=95, min_samples=5, initial_delay=1.0, min_delay=0.0)
+
+    for _ in range(5):
+        backend, _ = await hedger.call(_request, timeout=5.0)
+        assert backend is primary
+
+    assert alternate.calls == 0
+    assert 0.01 <= hedger.delay() < 0.5
+
+
+@pytest.mark.asyncio
+async def test_humanizer_hedges_on_configured_backends(monkeypatch):
+    monkeypatch.setenv('LLM_BACKEND', 'stub:1000')
+    monkeypatch.setenv('HEDGE_BACKEND', 'stub')
+    monkeypatch.setenv('HEDGE_INITIAL_DELAY_MS', '50')
+    from app.openai_client import OpenAIHumanizer
+
+    humanizer = OpenAIHumanizer()
+    result = await humanizer.restructure("Research suggests new findings.")
+
+    assert result['text'] == "Rewritten: Research suggests new findings."
+    assert result['processing_time'] < 0.5
+    assert humanizer.stats()['backends']['hedged'] == 1
+
+
+class CountingLimiter(RateLimiter):
+    def __init__(self, requests_per_minute):
+        super().__init__(requests_per_minute, 0)
+        self.charged = 0
+
+    async def acquire(self, tokens):
+        await super().acquire(tokens)
+        self.charged += 1
+
+    def try_acquire(self, tokens):
+        admitted = super().try_acquire(tokens)
+        self.charged += admitted
+        return admitted
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('rpm, charged, hedged', [(0, 2, 1), (10, 1, 0)])
+async def test_hedges_are_charged_to_the_rate_limiter(monkeypatch, rpm, charged, hedged):
+    monkeypatch.setenv('LLM_BACKEND', 'stub:300')
+    monkeypatch.setenv('HEDGE_BACKEND', 'stub')
+    monkeypatch.setenv('HEDGE_INITIAL_DELAY_MS', '50')
+    from app.openai_client import OpenAIHumanizer
+
+    humanizer = OpenAIHumanizer()
+    humanizer.limiter = CountingLimiter(rpm)  # At 10 RPM the bucket holds one request, spent on the primary
+    result = await humanizer.restructure("Research suggests new findings.")
+
+    assert result['text'] == "Rewritten: Research suggests new findings."
+    assert humanizer.limiter.charged == charged
+    assert humanizer.stats()['backends']['hedged'] == hedged
+    assert humanizer.stats()['backends']['hedges_skipped'] == 1 - hedged
+
+
+@pytest.mark.asyncio
+async def test_hedged_answers_are_not_cached_as_the_primary_models(monkeypatch):
+    monkeypatch.setenv('LLM_BACKEND', 'stub:300')
+    monkeypatch.setenv('HEDGE_BACKEND', 'stub')
+    monkeypatch.setenv('HEDGE_INITIAL_DELAY_MS', '50')
+    from app.openai_client import OpenAIHumanizer
+
+    humanizer = OpenAIHumanizer()
+    first = await humanizer.restructure("Research suggests new findings.")
+    second = await humanizer.restructure("Research suggests new findings.")
+
+    assert first['model_used'] == second['model_used'] == 'stub'
+    assert not second.get('from_cache')  # Asked again (and hedged again) rather than served from cache
+    assert humanizer.stats()['backends']['hedge_wins'] == 2
@@ -0,0 +1,24 @@
+import pytest
+
+from app.models import ProcessingMode
+
+
+@pytest.mark.asyncio
+async def test_balanced_mode_only_sends_flagged_sentences(humanizer, fake_completions):
+    text = (
+        "The garden which we planted is green. "
+        "Teams really utilize software to facilitate work. "
+        "We facilitate work with software. "
+        "The river which runs nearby is calm."
+    )
+
+    result = await humanizer.humanize(text, ProcessingMode.BALANCED)
+
+    prompts = [call['messages'][-1]['content'] for call in fake_completions.calls]
+    assert len(prompts) == 1
+    assert 'Teams' in prompts[0] and 'garden' not in prompts[0] and 'river' not in prompts[0]
+    # One indicator (a formal word) is not enough on its own
+    assert 'We facilitate work' not in prompts[0]
+    assert result['method_used'] == 'hybrid'
+    assert result['humanized'].startswith("The garden which we planted is green. Rewritten:")
+    assert result['humanized'].endswith("We facilitate work with software. The river which runs nearby is calm.")
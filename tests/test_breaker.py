@@ -0,0 +1,87 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from app.breaker import CircuitBreaker
+from app.models import ProcessingMode
+
+TEXT = "The effectiveness of AI is evident."
+
+
+@pytest.fixture
+def humanizer(humanizer, openai_humanizer):
+    openai_humanizer.max_retries = 0
+    openai_humanizer.breaker = CircuitBreaker(min_calls=2, cooldown=60)
+    return humanizer
+
+
+def test_breaker_opens_then_probes_half_open():
+    breaker = CircuitBreaker(error_rate=0.5, min_calls=4, window=4, slow_call=1.0, cooldown=0.05)
+    for success, seconds in [(True, 0.1), (False, 0.1), (True, 2.0), (True, 0.1)]:
+        breaker.record(success, seconds)
+
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.state == 'half_open'
+    assert breaker.allow()
+    assert not breaker.allow()  # Only one probe at a time
+    breaker.record(True, 0.1)
+    assert breaker.state == 'closed'
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_skips_openai(humanizer, fake_completions):
+    calls = []
+
+    async def unreachable(**kwargs):
+        calls.append(kwargs)
+        raise openai.APIConnectionError(request=httpx.Request("POST", "https://api.openai.com"))
+    fake_completions.create = unreachable
+
+    for _ in range(2):
+        result = await humanizer.humanize(TEXT, ProcessingMode.AGGRESSIVE)
+        assert result['method_used'] == 'regex_fallback'
+    result = await humanizer.humanize(TEXT, ProcessingMode.AGGRESSIVE)
+
+    assert len(calls) == 2
+    assert result['method_used'] == 'circuit_open_fallback'
+    assert 'OpenAI skipped: circuit open' in result['changes_applied']
+    assert humanizer.stats()['openai_rate_limits']['circuit']['state'] == 'open'
+
+
+@pytest.mark.asyncio
+async def test_aggressive_downgrades_when_openai_is_too_slow_for_the_budget(humanizer):
+    for _ in range(2):
+        humanizer.openai.breaker.record(True, 3.0)
+
+    result = await humanizer.humanize(TEXT, ProcessingMode.AGGRESSIVE, max_processing_time=1000)
+
+    assert result['method_used'] != 'openai_aggressive'
+    assert result['changes_applied'][-1] == 'Downgraded to balanced: OpenAI latency'
+
+
+@pytest.mark.asyncio
+async def test_stream_that_stalls_midway_counts_as_a_failure(openai_humanizer, fake_completions):
+    openai_humanizer.max_retries = 0
+    openai_humanizer.breaker = CircuitBreaker(min_calls=2, cooldown=60)
+
+    async def stalling(content):
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content="Rewritten "))])
+        await asyncio.sleep(1.0)
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content="too late"))])
+    fake_completions._stream = stalling
+
+    for number in range(2):
+        received = []
+        with pytest.raises(asyncio.TimeoutError):
+            async for delta in openai_humanizer.restructure_stream(f"Text number {number}.", timeout=0.1):
+                received.append(delta)
+        assert received == ["Rewritten "]
+
+    assert openai_humanizer.breaker.state == 'open'
@@ -0,0 +1,80 @@
+import time
+
+import pytest
+
+from app.cache import FastResultCache, MemoryLRU, ResponseCache
+from app.humanizer import HybridHumanizer
+from app.models import ProcessingMode
+
+
+def test_memory_lru_respects_byte_budget():
+    lru = MemoryLRU(max_bytes=10)
+    lru.set('a', 'x', 4)
+    lru.set('b', 'y', 4)
+    lru.get('a')
+    lru.set('c', 'z', 4)
+
+    assert lru.get('b') is None
+    assert lru.get('a') == 'x'
+    assert lru.bytes_used == 8
+
+
+def test_cache_key_covers_full_text_and_options():
+    key = ResponseCache.make_key('same prefix ' * 20 + 'one', 'gpt', 0.9, False, '1')
+
+    assert key == ResponseCache.make_key('same prefix ' * 20 + 'one', 'gpt', 0.9, False, '1')
+    assert key != ResponseCache.make_key('same prefix ' * 20 + 'two', 'gpt', 0.9, False, '1')
+    assert key != ResponseCache.make_key('same prefix ' * 20 + 'one', 'gpt', 0.9, True, '1')
+    assert key != ResponseCache.make_key('same prefix ' * 20 + 'one', 'gpt', 0.9, False, '2')
+
+
+@pytest.mark.asyncio
+async def test_restructure_serves_repeats_from_cache(openai_humanizer, fake_completions):
+    first = await openai_humanizer.restructure("Research suggests new findings.")
+    second = await openai_humanizer.restructure("Research suggests new findings.")
+
+    assert len(fake_completions.calls) == 1
+    assert second['from_cache'] is True
+    assert second['text'] == first['text']
+    assert openai_humanizer.cache.stats()['memory_hits'] == 1
+
+
+def test_fast_cache_drops_entries_of_older_rule_versions():
+    cache = FastResultCache(max_bytes=10000)
+    key = cache.make_key('text', 1, 'v1')
+    cache.get(key, 'v1')
+    cache.set(key, 'v1', {'humanized': 'done'}, 0.01)
+
+    assert cache.get(key, 'v1') == {'humanized': 'done'}
+    assert cache.get(cache.make_key('text', 1, 'v2'), 'v2') is None
+    cache.set(key, 'v1', {'humanized': 'stale'}, 0.01)
+    assert cache.stats()['entries'] == 0
+    assert cache.stats()['invalidations'] == 1
+
+
+@pytest.mark.asyncio
+async def test_seeded_fast_requests_are_memoized():
+    humanizer = HybridHumanizer()
+    text = "Furthermore, it is important to note that this works. Moreover, it helps."
+
+    first = await humanizer.humanize(text, ProcessingMode.FAST, seed=3)
+    second = await humanizer.humanize(text, ProcessingMode.FAST, seed=3)
+    batch = await humanizer.batch_humanize([text, "Another sentence here."], ProcessingMode.FAST, seed=3)
+
+    assert second['humanized'] == first['humanized'] == batch[0]['humanized']
+    assert second['changes_applied'] == first['changes_applied']
+    assert humanizer.fast_cache.stats()['hits'] == 2
+    await humanizer.humanize(text, ProcessingMode.FAST)
+    assert humanizer.fast_cache.stats()['hits'] == 2
+
+
+@pytest.mark.asyncio
+async def test_fast_batch_items_are_charged_their_share_of_the_time():
+    humanizer = HybridHumanizer()
+    texts = [f"Furthermore, item {i} utilizes data." for i in range(20)]
+
+    start = time.time()
+    results = await humanizer.batch_humanize(texts, ProcessingMode.FAST)
+    elapsed_ms = (time.time() - start) * 1000
+
+    assert sum(result['processing_time_ms'] for result in results) <= elapsed_ms
@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+from app.models import ProcessingMode
+from app.tokens import completion_tokens, estimate_tokens, split_chunks
+
+PARAGRAPH = " ".join(["Furthermore, the effectiveness of this approach is evident in several recent studies."] * 12)
+PARAGRAPHS = [f"Part {number}. {PARAGRAPH}" for number in range(4)]
+DOCUMENT = "\n\n".join(PARAGRAPHS)
+
+
+def test_chunks_follow_paragraphs_and_rejoin_exactly():
+    chunks = split_chunks(DOCUMENT, max_tokens=estimate_tokens(PARAGRAPHS[0]) + 10)
+
+    assert [chunk for chunk, _ in chunks] == PARAGRAPHS
+    assert ''.join(chunk + separator for chunk, separator in chunks) == DOCUMENT
+    # A paragraph over the budget is split between sentences
+    assert all(chunk.endswith('.') for chunk, _ in split_chunks(PARAGRAPH, max_tokens=40))
+
+
+def test_completion_budget_counts_tokens_not_characters():
+    assert completion_tokens(PARAGRAPH) < len(PARAGRAPH) // 2
+
+
+@pytest.mark.asyncio
+async def test_long_text_is_restructured_in_concurrent_chunks(humanizer, fake_completions):
+    humanizer.chunk_max_tokens = estimate_tokens(PARAGRAPHS[0]) + 10
+    fake_completions.delay = 0.2
+
+    start = time.monotonic()
+    result = await humanizer.humanize(DOCUMENT, ProcessingMode.AGGRESSIVE)
+
+    assert time.monotonic() - start < 0.6
+    assert result['method_used'] == 'openai_aggressive'
+    assert len(fake_completions.calls) == 4
+    positions = [result['humanized'].find(f"Rewritten: Part {number}.") for number in range(4)]
+    assert -1 not in positions and positions == sorted(positions)
+    prompts = [call['messages'][-1]['content'] for call in fake_completions.calls]
+    assert sum("This text continues from:" in prompt for prompt in prompts) == 3
+    assert 'OpenAI chunks: 4 of 4 rewritten' in result['changes_applied']
+
+
+@pytest.mark.asyncio
+async def test_truncated_chunk_falls_back_to_regex_and_is_not_cached(humanizer, fake_completions):
+    humanizer.chunk_max_tokens = estimate_tokens(PARAGRAPHS[0]) + 10
+    create = fake_completions.create
+
+    async def truncating_create(**kwargs):
+        response = await create(**kwargs)
+        if "Original: Part 2." in kwargs['messages'][-1]['content']:
+            response.choices[0].finish_reason = 'length'
+        return response
+
+    fake_completions.create = truncating_create
+    result = await humanizer.humanize(DOCUMENT, ProcessingMode.AGGRESSIVE)
+    calls = len(fake_completions.calls)
+    await humanizer.humanize(DOCUMENT, ProcessingMode.AGGRESSIVE)
+
+    assert 'OpenAI chunks: 3 of 4 rewritten' in result['changes_applied']
+    assert "Rewritten: Part 2." not in result['humanized'] and "Part 2." in result['humanized']
+    assert len(fake_completions.calls) == calls + 1  # Only the truncated chunk is asked for again
+
+
+@pytest.mark.asyncio
+async def test_short_aggressive_rewrite_fits_its_budget(humanizer, fake_completions):
+    text = "The effectiveness of AI is evident."
+    rewrite = ("Evidence of AI shows up everywhere, which people notice, which keeps growing, "
+               "and which makes its effectiveness clear.")
+    create = fake_completions.create
+
+    async def limited_create(**kwargs):
+        # Like the API: a reply longer than max_tokens stops early
+        response = await create(**kwargs)
+        response.choices[0].message.content = rewrite
+        response.choices[0].finish_reason = 'length' if estimate_tokens(rewrite) > kwargs['max_tokens'] else 'stop'
+        return response
+
+    fake_completions.create = limited_create
+    result = await humanizer.humanize(text, ProcessingMode.AGGRESSIVE)
+
+    assert completion_tokens(text, aggressive=True) >= 64
+    assert result['method_used'] == 'openai_aggressive'
+    assert 'OpenAI: success' in result['changes_applied']
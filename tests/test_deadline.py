@@ -0,0 +1,38 @@
+import time
+
+import pytest
+
+from app.deadline import Deadline
+from app.models import HumanizeRequest, ProcessingMode
+
+TEXT = "The effectiveness of AI is evident."
+
+
+@pytest.mark.asyncio
+async def test_openai_call_is_cut_off_at_the_deadline(humanizer, fake_completions):
+    fake_completions.delay = 2.0
+    start = time.monotonic()
+
+    result = await humanizer.humanize(TEXT, ProcessingMode.AGGRESSIVE, max_processing_time=300)
+
+    assert time.monotonic() - start < 1.0
+    assert result['method_used'] == 'deadline_fallback'
+    assert fake_completions.calls[0]['timeout'].read <= 0.3
+
+
+@pytest.mark.asyncio
+async def test_openai_is_skipped_when_budget_is_too_small(humanizer, fake_completions):
+    result = await humanizer.humanize(TEXT, ProcessingMode.AGGRESSIVE, max_processing_time=10)
+
+    assert fake_completions.calls == []
+    assert result['method_used'] == 'deadline_fallback'
+    assert 'OpenAI skipped: deadline' in result['changes_applied']
+
+
+def test_zero_budget_is_already_expired_and_no_budget_never_expires():
+    assert Deadline(0).expired() and not Deadline(0).allows_openai()
+    assert Deadline().remaining() is None and Deadline(None).allows_openai()
+
+
+def test_requests_without_a_budget_are_not_bounded_by_one():
+    assert HumanizeRequest(text=TEXT).max_processing_time is None
@@ -0,0 +1,70 @@
+import random
+import re
+
+import pytest
+from httpx import AsyncClient
+
+from app import detection
+from app.main import app
+
+WORDS = [
+    "which", "whichwhich", "as well as well as", "together with", "and", "band", "while", "enables people to",
+    "enables", "to", "benefits come from", "people", "persons", "utilize", "implement", "demonstrate",
+    "facilitate", "The", "A", "An", "I", "We", "This", "It", "is", "was", "Clearly", "quickly", ".", "!", "x",
+]
+SEPARATORS = [" ", " ", "  ", "", ". ", "\n"]
+
+
+def _reference_analyze(text):
+    """The original indicators, each computed with its own scan"""
+    score = 100
+    score -= len(re.findall(r'which', text)) * 15
+    score -= len(re.findall(r'together with|as well as', text)) * 10
+    score -= 20 if not re.match(r'^(The|An?|I|We|My)', text) else 0
+    score -= len(re.findall(r'enables \w+ to|benefits come from', text)) * 10
+    score -= 10 if re.search(r'people|persons', text) else 0
+    if any(len(s.split()) > 25 for s in text.split('.')):
+        score -= 15
+
+    sentences = re.split(r'[.!?]+', text)
+    structures = [' '.join(s.strip().split()[:3]) for s in sentences[:3] if s.strip()]
+    votes = sum([
+        len(re.findall(r'[.!?]\s+[A-Z]\w+\s+\w+ly\s+', text)) > 1,
+        len(sentences) >= 3 and len(set(structures)) < len(structures) * 0.7,
+        text.count('which') < 1,
+        len(re.findall(r'(utilize|implement|demonstrate|facilitate)', text)) > 2,
+    ])
+    return {
+        "text": text,
+        "ai_detection_estimate": max(0, min(100, score)),
+        "needs_enhancement": votes >= 2,
+        "indicators": {
+            "has_which_clauses": text.count("which") > 0,
+            "varied_conjunctions": len(set(re.findall(r'\b(and|together with|as well as|while)\b', text))) > 1,
+            "natural_opening": not re.match(r'^(The|An?|This|It) \w+ (is|are|was|were)', text),
+            "sentence_variety": len(set([len(s.split()) for s in text.split('.')])) > 2,
+        },
+    }
+
+
+def test_single_scan_matches_separate_scans():
+    rng = random.Random(11)
+    texts = ["".join(rng.choice(WORDS) + rng.choice(SEPARATORS) for _ in range(rng.randint(0, 40)))
+             for _ in range(3000)]
+    expected = [_reference_analyze(text) for text in texts]
+
+    assert [detection.analyze(text) for text in texts] == expected
+    assert detection.analyze_batch(texts) == expected
+
+
+@pytest.mark.asyncio
+async def test_analyze_batch_endpoint():
+    texts = ["The model is fast.", "People use it, which helps, and it works while we wait."]
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.post("/analyze/batch", json={"texts": texts})
+        single = await client.post("/analyze", params={"text": texts[1]})
+
+    assert response.status_code == 200
+    results = response.json()['results']
+    assert [result['text'] for result in results] == texts
+    assert results[1] == single.json()
@@ -0,0 +1,57 @@
+import pytest
+from httpx import AsyncClient
+
+from app import main
+from app.documents import IncrementalHumanizer, _segment_seed, split_segments
+from app.humanizer import HybridHumanizer
+from app.models import ProcessingMode
+
+PARAGRAPH = "Furthermore, AI utilizes data. Moreover, people demonstrate skills. Research suggests new findings."
+DOCUMENT = f"{PARAGRAPH}\n\nThe effectiveness of AI is evident. It is crucial to rest."
+
+
+def test_split_segments_round_trips():
+    sentences, separators = split_segments(DOCUMENT + "\n")
+    assert ''.join(s + sep for s, sep in zip(sentences, separators)) == DOCUMENT + "\n"
+    assert sentences[:3] == ["Furthermore, AI utilizes data.", "Moreover, people demonstrate skills.",
+                             "Research suggests new findings."]
+    assert separators[2] == "\n\n"
+
+
+@pytest.mark.asyncio
+async def test_only_edited_sentences_are_reprocessed(humanizer, fake_completions, monkeypatch):
+    monkeypatch.setattr(main, 'humanizer', humanizer)
+    monkeypatch.setattr(main, 'documents', IncrementalHumanizer(humanizer))
+
+    async with AsyncClient(app=main.app, base_url="http://test") as client:
+        first = (await client.post("/documents/doc-1/revisions", json={"text": DOCUMENT, "mode": "aggressive"})).json()
+        calls = len(fake_completions.calls)
+        edited = DOCUMENT.replace("It is crucial to rest.", "It is crucial to sleep.")
+        second = (await client.post("/documents/doc-1/revisions", json={"text": edited, "mode": "aggressive"})).json()
+        stored = (await client.get("/documents/doc-1")).json()
+        deleted = await client.delete("/documents/doc-1")
+        missing = await client.get("/documents/doc-1")
+
+    assert first['revision'] == 1 and first['segments_reprocessed'] == 5
+    assert second['revision'] == 2 and second['segments_reprocessed'] == 1
+    assert len(fake_completions.calls) == calls + 1
+    assert second['humanized'].endswith("\n\nRewritten: The effectiveness of AI is evident. Rewritten: It is crucial to sleep.")
+    # Unchanged sentences keep their earlier output, paragraph breaks included
+    assert second['humanized'].split("\n\n")[0] == first['humanized'].split("\n\n")[0]
+    assert stored['humanized'] == second['humanized'] and stored['revision'] == 2
+    assert deleted.status_code == 204 and missing.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_seeded_sentences_each_get_their_own_seed():
+    humanizer = HybridHumanizer()
+    documents = IncrementalHumanizer(humanizer)
+    sentences = [f"Sentence {number} utilizes data." for number in range(6)]
+    seeds = [_segment_seed(7, sentence) for sentence in sentences]
+
+    result = await documents.revise("doc", ' '.join(sentences), ProcessingMode.FAST, seed=7)
+    expected = [(await humanizer.humanize(sentence, ProcessingMode.FAST, seed=seed))['humanized']
+                for sentence, seed in zip(sentences, seeds)]
+
+    assert len(set(seeds)) == len(seeds)
+    assert result['humanized'] == ' '.join(expected)
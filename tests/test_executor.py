@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from app.executor import RegexExecutor
+from app.patterns import AdvancedPatterns
+
+
+@pytest.mark.asyncio
+async def test_process_pool_batch_matches_input_order():
+    executor = RegexExecutor(AdvancedPatterns(), backend='process', workers=2, inline_threshold=0)
+    texts = [f"Sentence number {i} stays put." for i in range(6)]
+    try:
+        results = await executor.apply_many(texts)
+    finally:
+        executor.shutdown()
+
+    assert [text for text, _ in results] == texts
+
+
+@pytest.mark.asyncio
+async def test_short_text_runs_inline_without_pool():
+    executor = RegexExecutor(AdvancedPatterns(), backend='process', inline_threshold=1000)
+    text, changes = await executor.apply("Nothing to change here.")
+    assert text == "Nothing to change here."
+    assert executor.stats()['pool_started'] is False
+
+
+@pytest.mark.asyncio
+async def test_seeded_output_is_the_same_inline_and_on_the_pool():
+    text = "Additionally, individuals utilize tools and demonstrate skills. However, research helps people to adapt."
+    inline = RegexExecutor(AdvancedPatterns(), backend='process', workers=1, inline_threshold=10_000)
+    pooled = RegexExecutor(AdvancedPatterns(), backend='process', workers=1, inline_threshold=0)
+    try:
+        expected = await inline.apply(text, seed=7)
+        assert await pooled.apply(text, seed=7) == expected
+        assert await pooled.apply_many([text, text], seed=7) == [expected, expected]
+    finally:
+        pooled.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_calls_start_one_pool_off_the_loop():
+    executor = RegexExecutor(AdvancedPatterns(), backend='process', workers=1, inline_threshold=0)
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    ticker = asyncio.create_task(tick())
+    try:
+        await asyncio.gather(executor.apply("First text."), executor.apply("Second text."))
+        pool = executor._pool
+        await executor.ensure_started()
+        assert executor._pool is pool is not None
+    finally:
+        ticker.cancel()
+        executor.shutdown()
+
+    assert ticks > 2  # The loop kept running while the worker spawned
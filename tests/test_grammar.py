@@ -0,0 +1,54 @@
+import random
+import re
+
+from app.grammar import GrammarFixer
+from app.patterns import TYPO_RULES
+
+WORDS = [
+    "people", "People", "persons", "STUDENTS", "researchers", "companies", "has", "HAS", "have",
+    "the", "The", "a", "A", "while", "While", "although", "because", "which", "Which",
+    "together", "with", "as", "well", "development", "innovation", "research", "ability", "to",
+    "been", "are", "is", "by", "for", "in", "on", "at", "x", ".", ",", "_", "ı", "K",
+]
+SEPARATORS = [" ", " ", " ", "  ", "\t", "\n", "  ", ""]
+
+
+def _sequential_fix(text):
+    """Reference implementation: every rule as its own re.sub, in order"""
+    fixes = []
+    for pattern, replacement in TYPO_RULES:
+        new_text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
+        if new_text != text:
+            fixes.append(f"Grammar fix: {pattern} → {replacement}")
+        text = new_text
+    return text, fixes
+
+
+def _random_text(rng):
+    pieces = [rng.choice(SEPARATORS) if rng.random() < 0.2 else ""]
+    for _ in range(rng.randint(0, 14)):
+        pieces.append(rng.choice(WORDS))
+        pieces.append(rng.choice(SEPARATORS))
+    return "".join(pieces)
+
+
+def test_matches_sequential_rules():
+    fixer = GrammarFixer()
+    rng = random.Random(7)
+    texts = [_random_text(rng) for _ in range(5000)] + [
+        "",
+        "  ",
+        "People has the ability to learn while while the the students has been busy.",
+        "Our work together with together with development. Is are fine.",
+        "Companies has   grown\n because because a a  market",
+    ]
+    for text in texts:
+        assert fixer.fix(text) == _sequential_fix(text), repr(text)
+
+
+def test_noop_rules_are_skipped_and_reported(capsys):
+    fixer = GrammarFixer()
+
+    assert capsys.readouterr().out == ''  # Logged by RuleManager on load, not by every fixer
+    assert fixer.noop_rules == [r'\b(with|by|for|in|on|at) \b']
+    assert fixer.stats()['passes'] < len(TYPO_RULES)
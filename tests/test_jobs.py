@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+
+from app import main
+from app.jobs import JobManager, MemoryJobBackend
+
+
+@pytest_asyncio.fixture
+async def jobs(humanizer, monkeypatch):
+    jobs = JobManager(humanizer, backend=MemoryJobBackend(), workers=2, chunk_size=7)
+    monkeypatch.setattr(main, 'humanizer', humanizer)
+    monkeypatch.setattr(main, 'jobs', jobs)
+    yield jobs
+    await jobs.stop()
+
+
+async def _wait_for(client, job_id):
+    for _ in range(200):
+        job = (await client.get(f"/jobs/{job_id}", params={"limit": 1})).json()
+        if job['status'] in ('completed', 'failed'):
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+@pytest.mark.asyncio
+async def test_job_runs_in_background_and_pages_results(jobs):
+    texts = [f"Sentence number {i} is utilized together with tests." for i in range(25)]
+    async with AsyncClient(app=main.app, base_url="http://test") as client:
+        created = await client.post("/jobs", json={"texts": texts, "mode": "fast"})
+        assert created.status_code == 202
+        job_id = created.json()['job_id']
+        assert created.json()['total'] == 25
+
+        job = await _wait_for(client, job_id)
+        assert job['status'] == 'completed'
+        assert job['completed'] == 25 and job['progress'] == 1.0
+
+        page = (await client.get(f"/jobs/{job_id}", params={"offset": 20, "limit": 10})).json()
+
+    assert [item['index'] for item in page['results']] == [20, 21, 22, 23, 24]
+    assert page['results'][0]['result']['original'] == texts[20]
+    assert page['next_offset'] is None
+
+
+@pytest.mark.asyncio
+async def test_unknown_job_is_404(jobs):
+    async with AsyncClient(app=main.app, base_url="http://test") as client:
+        response = await client.get("/jobs/missing")
+    assert response.status_code == 404
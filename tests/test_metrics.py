@@ -0,0 +1,47 @@
+import pytest
+from httpx import AsyncClient
+from prometheus_client import REGISTRY
+
+from app import main
+from app.humanizer import HybridHumanizer
+from app.metrics import REGEX_STAGES
+from app.models import ProcessingMode
+
+TEXT = "Furthermore, it is important to note that AI utilizes data. Moreover, individuals demonstrate skills."
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.mark.asyncio
+async def test_stages_and_outcomes_are_exported(humanizer, monkeypatch):
+    monkeypatch.setattr(main, 'humanizer', humanizer)
+    stages = REGEX_STAGES + ('typo_fixes', 'detection', 'openai_call')
+    before = {stage: _sample('humanizer_stage_seconds_count', stage=stage) for stage in stages}
+    fast_before = _sample('humanizer_requests_total', mode='fast', method='regex_only')
+
+    await humanizer.humanize(TEXT, ProcessingMode.FAST)
+    await humanizer.humanize(TEXT, ProcessingMode.AGGRESSIVE)
+
+    for stage in stages:
+        assert _sample('humanizer_stage_seconds_count', stage=stage) > before[stage], stage
+    assert _sample('humanizer_requests_total', mode='fast', method='regex_only') == fast_before + 1
+
+    async with AsyncClient(app=main.app, base_url="http://test") as client:
+        response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert 'humanizer_stage_seconds_bucket{le="0.001",stage="word_patterns"}' in response.text
+
+
+@pytest.mark.asyncio
+async def test_cpu_time_saved_by_the_fast_cache_is_exported():
+    humanizer = HybridHumanizer()
+    before = _sample('humanizer_cpu_seconds_saved_total', cache='fast')
+
+    await humanizer.humanize(TEXT, ProcessingMode.FAST, seed=5)
+    await humanizer.humanize(TEXT, ProcessingMode.FAST, seed=5)
+
+    saved = _sample('humanizer_cpu_seconds_saved_total', cache='fast') - before
+    assert saved > 0
+    assert saved == pytest.approx(humanizer.fast_cache.stats()['saved_cpu_ms'] / 1000)
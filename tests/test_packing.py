@@ -0,0 +1,35 @@
+import pytest
+
+from app.models import ProcessingMode
+
+TEXTS = [f"Short snippet number {i} about testing." for i in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_short_batch_texts_share_one_completion(humanizer, fake_completions):
+    results = await humanizer.batch_humanize(TEXTS, ProcessingMode.AGGRESSIVE)
+
+    assert len(fake_completions.calls) == 1
+    assert [result['method_used'] for result in results] == ['openai_aggressive'] * len(TEXTS)
+    assert [result['humanized'] for result in results] == [f"Rewritten: {text}" for text in TEXTS]
+
+
+@pytest.mark.asyncio
+async def test_unparseable_pack_falls_back_to_individual_calls(humanizer, fake_completions):
+    fake_completions.malformed_packs = True
+
+    results = await humanizer.batch_humanize(TEXTS, ProcessingMode.AGGRESSIVE)
+
+    assert len(fake_completions.calls) == 1 + len(TEXTS)
+    assert [result['humanized'] for result in results] == [f"Rewritten: {text}" for text in TEXTS]
+    assert humanizer.openai.stats()['packing']['fallbacks'] == 1
+
+
+@pytest.mark.asyncio
+async def test_shared_prompt_is_counted_once_per_pack(humanizer, fake_completions):
+    texts = [f"Short snippet number {i} about testing." for i in range(20)]
+
+    await humanizer.batch_humanize(texts, ProcessingMode.AGGRESSIVE)
+
+    assert len(fake_completions.calls) == 1
+    assert humanizer.openai.stats()['packing']['avg_items_per_pack'] == 20
@@ -0,0 +1,28 @@
+import pytest
+from httpx import AsyncClient
+
+from app import main
+from app.humanizer import HybridHumanizer
+
+TEXT = "Furthermore, AI utilizes data and people utilize tools. Moreover, individuals utilize apps and demonstrate skills."
+
+
+@pytest.mark.asyncio
+async def test_original_can_be_left_out_and_changes_counted(monkeypatch):
+    humanizer = HybridHumanizer()
+    monkeypatch.setattr(main, 'humanizer', humanizer)
+    body = {"text": TEXT, "mode": "fast", "seed": 3}
+
+    async with AsyncClient(app=main.app, base_url="http://test") as client:
+        full = (await client.post("/humanize", json=body)).json()
+        slim = (await client.post("/humanize", json={**body, "include_original": False, "changes_format": "counts"})).json()
+        batch = (await client.post("/batch", json={"texts": [TEXT, TEXT], "mode": "fast", "seed": 3,
+                                                   "include_original": False, "changes_format": "counts"})).json()
+
+    assert full['original'] == TEXT and 'original' not in slim
+    assert slim['humanized'] == full['humanized']
+    assert sum(slim['changes_applied'].values()) == len(full['changes_applied'])
+    assert list(slim['changes_applied']) == list(dict.fromkeys(full['changes_applied']))
+    assert batch['total_texts'] == 2
+    assert [result['changes_applied'] for result in batch['results']] == [slim['changes_applied']] * 2
+    assert all('original' not in result for result in batch['results'])
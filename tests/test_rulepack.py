@@ -0,0 +1,127 @@
+import json
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+from app import rulepack
+from app.executor import RegexExecutor
+from app.rule_engine import DEFAULT_RULES_PATH, load_pack
+from app.rulepack import RuleManager, load_snapshot
+
+
+def _pack(word_patterns):
+    with open(DEFAULT_RULES_PATH) as f:
+        pack = json.load(f)
+    pack['word_patterns'] = word_patterns
+    return pack
+
+
+@pytest.fixture
+def pack_file(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(_pack([{"pattern": r"\bcolour\b", "replace": "color"}])))
+    return path
+
+
+def test_snapshot_round_trip_keeps_behaviour(pack_file, tmp_path):
+    rules = RuleManager(str(pack_file), str(tmp_path / "cache")).current
+    loaded = load_snapshot(rules.snapshot)
+
+    text = "The colour of the sea which which shifts. It is important to see."
+    random.seed(3)
+    expected = rules.patterns.apply_patterns(text)
+    random.seed(3)
+    assert loaded.patterns.apply_patterns(text) == expected
+    assert loaded.grammar.fix(expected[0]) == rules.grammar.fix(expected[0])
+    assert loaded.version == rules.version
+
+
+def test_snapshots_in_a_shared_directory_are_not_loaded(pack_file, tmp_path):
+    cache = tmp_path / "cache"
+    rules = RuleManager(str(pack_file), str(cache)).current
+    cache.chmod(0o777)  # As if anyone could have planted the pickle
+
+    with pytest.raises(PermissionError):
+        load_snapshot(rules.snapshot)
+    # The manager compiles the pack instead, and does not write into the shared directory either
+    assert RuleManager(str(pack_file), str(cache)).current.snapshot is None
+
+
+def test_snapshot_write_failure_falls_back_to_compiled_rules(pack_file, tmp_path, monkeypatch):
+    def broken(pattern):
+        raise TypeError("sre internals changed")
+
+    monkeypatch.setattr(rulepack, '_reduce_pattern', broken)
+    manager = RuleManager(str(pack_file), str(tmp_path / "cache"))
+
+    assert manager.current.snapshot is None
+    assert manager.current.patterns.apply_patterns("colour")[0] == "color"
+
+
+def test_weighted_choices_and_group_templates(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(_pack([
+        {"pattern": r"\bbig\b", "choices": [{"text": "large", "weight": 0}, {"text": "huge", "weight": 1}]},
+        {"pattern": r"(\w+) helps (\w+)", "replace": r"\2 is helped by \1"},
+    ])))
+    patterns = RuleManager(str(path), "").current.patterns
+
+    assert patterns.apply_patterns("a big tool helps people")[0] == "a huge people is helped by tool"
+
+
+def test_invalid_pack_is_rejected_with_its_location(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(_pack([{"pattern": r"(\w+) x", "replace": r"\2"}])))
+
+    with pytest.raises(ValueError, match=r"word_patterns\[0\]"):
+        load_pack(str(path))
+
+
+@pytest.mark.asyncio
+async def test_reload_swaps_rules_and_keeps_them_on_error(pack_file, tmp_path):
+    manager = RuleManager(str(pack_file), str(tmp_path / "cache"))
+    old = manager.current
+
+    pack_file.write_text(json.dumps(_pack([{"pattern": r"\bcolour\b", "replace": "hue"}])))
+    result = await manager.reload()
+    assert result['changed'] and result['previous_version'] == old.version
+    assert manager.current.patterns.apply_patterns("colour")[0] == "hue"
+    assert old.patterns.apply_patterns("colour")[0] == "color"  # Holders of the old set are unaffected
+
+    pack_file.write_text("{not json")
+    with pytest.raises(ValueError):
+        await manager.reload()
+    assert manager.current.patterns.apply_patterns("colour")[0] == "hue"
+    assert manager.stats()['last_error']
+
+
+@pytest.mark.asyncio
+async def test_pool_workers_follow_rule_version(pack_file, tmp_path):
+    manager = RuleManager(str(pack_file), str(tmp_path / "cache"))
+    executor = RegexExecutor(manager, backend='process', workers=1, inline_threshold=0)
+    try:
+        assert await executor.apply("colour") == ("color", [r"Word replacement: \bcolour\b"])
+
+        pack_file.write_text(json.dumps(_pack([{"pattern": r"\bcolour\b", "replace": "hue"}])))
+        await manager.reload()
+        assert (await executor.apply("colour"))[0] == "hue"
+    finally:
+        executor.shutdown()
+
+
+def test_build_step_snapshot_is_loaded_at_startup(tmp_path, capsys):
+    cache = tmp_path / "cache"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, "-m", "app.rulepack"], cwd=root, check=True, capture_output=True,
+                   env={**os.environ, "RULES_CACHE_DIR": str(cache)})
+    [snapshot] = cache.iterdir()
+    built_at = snapshot.stat().st_mtime_ns
+
+    manager = RuleManager(cache_dir=str(cache))
+
+    assert manager.current.snapshot == str(snapshot)
+    assert snapshot.stat().st_mtime_ns == built_at  # Loaded, not recompiled and rewritten
+    assert "Ignoring unreadable rule snapshot" not in capsys.readouterr().out
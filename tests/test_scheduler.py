@@ -0,0 +1,63 @@
+import asyncio
+import time
+
+import httpx
+import openai
+import pytest
+
+from app.scheduler import BatchScheduler, RateLimiter, TokenBucket, call_with_retries
+
+
+@pytest.mark.asyncio
+async def test_scheduler_bounds_concurrency_and_yields_in_completion_order():
+    scheduler = BatchScheduler(concurrency=2)
+    running = 0
+    peak = 0
+
+    async def work(delay):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(delay)
+        running -= 1
+        return delay
+
+    order = [index async for index, _ in scheduler.run([0.05, 0.01, 0.02], work)]
+
+    assert peak == 2
+    assert order == [1, 2, 0]
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_spaces_out_requests():
+    bucket = TokenBucket(per_minute=600, capacity=1)  # 10 per second
+    start = time.monotonic()
+    for _ in range(3):
+        await bucket.acquire()
+    assert time.monotonic() - start >= 0.18
+
+
+@pytest.mark.asyncio
+async def test_request_larger_than_the_bucket_is_charged_in_full():
+    bucket = TokenBucket(per_minute=6000, capacity=10)  # 100 per second
+    await bucket.acquire(30)
+    start = time.monotonic()
+    await bucket.acquire(1)
+    # The 20 tokens of debt and the next one have to refill first
+    assert time.monotonic() - start >= 0.2
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_errors_are_retried(monkeypatch):
+    monkeypatch.setattr('app.scheduler.retry_delay', lambda error, attempt: 0)
+    request = httpx.Request('POST', 'https://api.openai.com/v1/chat/completions')
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise openai.RateLimitError('slow down', response=httpx.Response(429, request=request), body=None)
+        return 'ok'
+
+    assert await call_with_retries(flaky, RateLimiter(0, 0), tokens=10, retries=3) == 'ok'
+    assert len(attempts) == 3
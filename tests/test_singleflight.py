@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+from app.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_restructures_share_one_completion(openai_humanizer, fake_completions):
+    fake_completions.delay = 0.05
+    results = await asyncio.gather(*(
+        openai_humanizer.restructure("Companies are facing challenges.") for _ in range(5)
+    ))
+
+    assert len(fake_completions.calls) == 1
+    assert len({result['text'] for result in results}) == 1
+    assert openai_humanizer.inflight.stats()['coalesced'] == 4
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_shared_call():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def work():
+        await release.wait()
+        return 'done'
+
+    first = asyncio.ensure_future(flight.do('key', work))
+    second = asyncio.ensure_future(flight.do('key', work))
+    await asyncio.sleep(0)
+    assert flight.stats()['waiters'] == 2
+
+    first.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await second == 'done'
+    with pytest.raises(asyncio.CancelledError):
+        await first
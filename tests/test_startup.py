@@ -0,0 +1,85 @@
+import asyncio
+import os
+import subprocess
+import sys
+
+import pytest
+from httpx import AsyncClient
+
+from app import main, startup
+from app.humanizer import HybridHumanizer
+from app.jobs import JobManager, MemoryJobBackend
+from app.models import ProcessingMode
+
+TEXT = "Furthermore, it is important to note that AI utilizes data."
+
+
+def test_importing_the_app_does_not_load_openai_numpy_or_httpx():
+    code = "import sys, app.main; print('openai' in sys.modules, 'numpy' in sys.modules, 'httpx' in sys.modules)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout
+    assert output.split() == ['False', 'False', 'False']
+
+
+@pytest.mark.asyncio
+async def test_openai_client_is_built_on_first_non_fast_use(openai_key):
+    humanizer = HybridHumanizer()
+    await humanizer.humanize(TEXT, ProcessingMode.FAST)
+    await humanizer.batch_humanize([TEXT, TEXT], ProcessingMode.FAST)
+
+    assert not humanizer.openai_started
+    assert humanizer.stats()['openai_rate_limits'] is None
+
+    assert humanizer.openai is humanizer.openai
+    assert humanizer.openai_started
+    assert 'openai_client' in startup.timer.report()['deferred_ms']
+
+
+@pytest.mark.asyncio
+async def test_unknown_backend_fails_startup(monkeypatch):
+    monkeypatch.setenv('LLM_BACKEND', 'bogus')
+
+    with pytest.raises(ValueError, match='bogus'):
+        async with main.lifespan(main.app):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_failed_warm_up_is_reported_in_health(openai_key, monkeypatch):
+    async def broken(connections):
+        raise RuntimeError("client could not be built")
+
+    monkeypatch.setattr(main, 'warm_up_openai', broken)
+    monkeypatch.setattr(main, 'openai_warm_up_error', None)
+    async with main.lifespan(main.app):
+        await asyncio.sleep(0.01)
+        async with AsyncClient(app=main.app, base_url="http://test") as client:
+            health = (await client.get("/health")).json()
+
+    assert health['status'] == 'degraded'
+    assert health['openai_warm_up_error'] == "client could not be built"
+
+
+@pytest.mark.asyncio
+async def test_fast_batch_stream_and_jobs_work_without_an_openai_key(monkeypatch):
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    humanizer = HybridHumanizer()
+    jobs = JobManager(humanizer, backend=MemoryJobBackend(), workers=1)
+    monkeypatch.setattr(main, 'humanizer', humanizer)
+    monkeypatch.setattr(main, 'jobs', jobs)
+
+    try:
+        async with AsyncClient(app=main.app, base_url="http://test") as client:
+            stream = await client.post("/batch/stream", json={"texts": [TEXT, TEXT], "mode": "fast"})
+            job_id = (await client.post("/jobs", json={"texts": [TEXT] * 3, "mode": "fast"})).json()['job_id']
+            for _ in range(100):
+                job = (await client.get(f"/jobs/{job_id}")).json()
+                if job['status'] in ('completed', 'failed'):
+                    break
+                await asyncio.sleep(0.01)
+    finally:
+        await jobs.stop()
+
+    assert stream.status_code == 200 and len(stream.text.splitlines()) == 3
+    assert job['status'] == 'completed' and len(job['results']) == 3
+    assert not humanizer.openai_started
@@ -0,0 +1,46 @@
+import json
+
+import pytest
+from httpx import AsyncClient
+
+from app import main
+
+
+@pytest.fixture
+def humanizer(humanizer, monkeypatch):
+    monkeypatch.setattr(main, 'humanizer', humanizer)
+    return humanizer
+
+
+async def _events(payload):
+    async with AsyncClient(app=main.app, base_url="http://test") as client:
+        response = await client.post("/humanize/stream", json=payload)
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('application/x-ndjson')
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+@pytest.mark.asyncio
+async def test_fast_stream_sends_sentences_then_done(humanizer):
+    events = await _events({"text": "First plain sentence. Second plain sentence.", "mode": "fast"})
+
+    assert [event['type'] for event in events] == ['sentence', 'sentence', 'done']
+    assert ''.join(event['text'] for event in events[:-1]) == events[-1]['humanized']
+    assert 'ai_detection_estimate' in events[-1] and 'changes_applied' in events[-1]
+
+
+@pytest.mark.asyncio
+async def test_balanced_stream_relays_openai_tokens_in_order(humanizer):
+    text = (
+        "The garden which we planted is green. "
+        "Teams really utilize software to facilitate work. "
+        "The river which runs nearby is calm."
+    )
+    events = await _events({"text": text, "mode": "balanced"})
+    types = [event['type'] for event in events]
+
+    assert types[0] == 'sentence' and types[-2] == 'sentence' and types[-1] == 'done'
+    assert 'token' in types
+    streamed = ''.join(event['text'] for event in events[:-1])
+    assert streamed.startswith("The garden which we planted is green. Rewritten:")
+    assert events[-1]['method_used'] == 'hybrid'
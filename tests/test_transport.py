@@ -0,0 +1,44 @@
+import httpx
+import openai
+import pytest
+from httpx import AsyncClient
+
+from app import main
+
+
+@pytest.mark.asyncio
+async def test_health_reflects_recent_calls_without_calling_openai(humanizer, openai_humanizer, fake_completions,
+                                                                  monkeypatch):
+    monkeypatch.setattr(main, 'humanizer', humanizer)
+
+    async with AsyncClient(app=main.app, base_url="http://test") as client:
+        assert (await client.get("/health")).json()['openai_connected'] is None
+
+        await openai_humanizer.restructure("Research suggests new findings.")
+        healthy = (await client.get("/health")).json()
+
+        async def unreachable(**kwargs):
+            raise openai.APIConnectionError(request=httpx.Request("POST", "https://api.openai.com"))
+        fake_completions.create = unreachable
+        openai_humanizer.max_retries = 0
+        await openai_humanizer.restructure("Another text entirely.")
+        degraded = (await client.get("/health")).json()
+
+    assert len(fake_completions.calls) == 1
+    assert healthy['status'] == 'healthy' and healthy['openai_connected'] is True
+    assert degraded['status'] == 'degraded' and degraded['openai_connected'] is False
+    assert degraded['openai']['recent_calls'] == 2
+    assert degraded['openai']['recent_failures'] == 1
+
+
+def test_pool_is_sized_from_environment(openai_key, monkeypatch):
+    monkeypatch.setenv('OPENAI_MAX_CONNECTIONS', '12')
+    monkeypatch.setenv('OPENAI_HTTP2', '0')
+    from app.openai_client import OpenAIHumanizer
+
+    pool = OpenAIHumanizer().stats()['http_pool']
+
+    assert pool['max_connections'] == 12
+    assert pool['max_keepalive'] == 12
+    assert pool['http2'] is False
+    assert pool['connections'] == 0